@@ -0,0 +1,325 @@
+"""
+Load generator and latency benchmark for the write path.
+
+Sends RecordTransaction writes either through the load balancer (HTTP
+POST /record) or straight to a node over gRPC, in one of two modes:
+
+  closed  --concurrency clients each send their next write as soon as
+          the previous one returns; throughput is whatever the system
+          sustains
+  open    writes arrive at a fixed --rate (evenly spaced or Poisson),
+          whether or not earlier ones have finished; latency is measured
+          from the scheduled send time, so queueing delay is included
+          instead of hidden (no coordinated omission)
+
+Batch IDs are drawn from a uniform, Zipf-skewed or sequential
+distribution. With --standin the tool first spawns the real nodes on a
+database-free storage engine (standin.py; --storage memory or log) and,
+for the load-balancer target, load_balancer.py itself, so it runs without
+Docker. Comparing --storage memory with log (or a Mongo-backed cluster)
+separates RPC cost from storage cost:
+
+    python bench.py --standin --target lb --mode closed --concurrency 32
+    python bench.py --standin --storage log --target grpc --mode open --rate 2000 --dist zipf
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+import aiohttp
+import grpc
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+import ledger_pb2
+import ledger_pb2_grpc
+from standin import STORAGE_ENGINES, start_nodes, stop_nodes
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LB_DIR = os.path.join(os.path.dirname(HERE), "load-balancer")
+REQUEST_TIMEOUT = 10     # seconds per write
+STARTUP_TIMEOUT = 20     # seconds to wait for spawned stand-ins / load balancer
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+# ---------------------- Batch IDs ----------------------
+class BatchIds:
+    """Draws batch IDs from a uniform, Zipf or sequential distribution"""
+
+    def __init__(self, dist, batches, zipf_s=1.1, seed=None):
+        self.dist = dist
+        self.batches = batches
+        self.random = random.Random(seed)
+        self.counter = 0
+        if dist == "zipf":
+            weights = [1 / (rank ** zipf_s) for rank in range(1, batches + 1)]
+            total, acc, self.cdf = sum(weights), 0.0, []
+            for w in weights:
+                acc += w / total
+                self.cdf.append(acc)
+
+    def next(self):
+        if self.dist == "sequential":
+            self.counter += 1
+            return f"BENCH{self.counter}"
+        if self.dist == "zipf":
+            rank = min(bisect.bisect_left(self.cdf, self.random.random()), self.batches - 1)
+        else:
+            rank = self.random.randrange(self.batches)
+        return f"BENCH{rank}"
+
+
+# ---------------------- Targets ----------------------
+class GrpcTarget:
+    """RecordTransaction straight to a node over one grpc.aio channel"""
+
+    def __init__(self, address):
+        self.address = address
+        self.channel = None
+
+    async def open(self):
+        self.channel = grpc.aio.insecure_channel(self.address)
+        self.stub = ledger_pb2_grpc.LedgerServiceStub(self.channel)
+
+    async def send(self, batch_id):
+        await self.stub.RecordTransaction(ledger_pb2.TransactionRequest(
+            batch_id=batch_id, sender="Bench", receiver="Bench", status="Shipped", tx_id=uuid.uuid4().hex
+        ), timeout=REQUEST_TIMEOUT)
+
+    async def close(self):
+        await self.channel.close()
+
+
+class HttpTarget:
+    """POST /record through the load balancer"""
+
+    def __init__(self, url, connections):
+        self.url = url
+        self.connections = connections
+
+    async def open(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connections),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+
+    async def send(self, batch_id):
+        payload = {"batch_id": batch_id, "sender": "Bench", "receiver": "Bench", "status": "Shipped"}
+        async with self.session.post(self.url, json=payload) as response:
+            body = await response.read()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}: {body[:200]!r}")
+
+    async def close(self):
+        await self.session.close()
+
+
+# ---------------------- Recording ----------------------
+class Recorder:
+    """Latencies of writes that started after the warm-up"""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = []
+        self.errors = 0
+        self.dropped = 0
+        self.last_error = None
+
+    async def timed(self, target, batch_id, started):
+        try:
+            await target.send(batch_id)
+        except Exception as e:
+            if started >= self.measure_from:
+                self.errors += 1
+                self.last_error = e
+            return
+        if started >= self.measure_from:
+            self.latencies.append(time.perf_counter() - started)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return math.nan
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(recorder, elapsed):
+    values = sorted(recorder.latencies)
+    return {
+        "ok": len(values),
+        "errors": recorder.errors,
+        "dropped": recorder.dropped,
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            **{f"p{p:g}": round(percentile(values, p) * 1000, 3) for p in PERCENTILES},
+            "max": round(values[-1] * 1000, 3) if values else math.nan,
+        },
+    }
+
+
+# ---------------------- Load modes ----------------------
+async def closed_loop(target, ids, recorder, concurrency, deadline):
+    async def client():
+        while time.perf_counter() < deadline:
+            await recorder.timed(target, ids.next(), time.perf_counter())
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+async def open_loop(target, ids, recorder, rate, deadline, arrivals, max_in_flight):
+    in_flight = set()
+    rng = random.Random()
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            if scheduled >= recorder.measure_from:
+                recorder.dropped += 1  # the system fell this far behind; don't pile on more
+        else:
+            # Latency counts from the scheduled time, not from when we got round to sending
+            task = asyncio.ensure_future(recorder.timed(target, ids.next(), scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        scheduled += rng.expovariate(rate) if arrivals == "poisson" else 1 / rate
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def run(args):
+    if args.target == "grpc":
+        target = GrpcTarget(args.grpc)
+    else:
+        # Open loop must not queue behind a connection limit the load balancer never sees
+        target = HttpTarget(args.url, args.concurrency if args.mode == "closed" else 0)
+    ids = BatchIds(args.dist, args.batches, args.zipf_s, args.seed)
+    await target.open()
+    try:
+        start = time.perf_counter()
+        recorder = Recorder(start + args.warmup)
+        deadline = start + args.warmup + args.duration
+        if args.mode == "closed":
+            await closed_loop(target, ids, recorder, args.concurrency, deadline)
+        else:
+            await open_loop(target, ids, recorder, args.rate, deadline, args.arrivals, args.max_in_flight)
+        elapsed = min(time.perf_counter(), deadline) - recorder.measure_from
+    finally:
+        await target.close()
+    return summarize(recorder, elapsed), recorder.last_error
+
+
+# ---------------------- Stand-in environment ----------------------
+def wait_until(check, what):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            if check():
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{what} did not come up within {STARTUP_TIMEOUT}s")
+
+
+def node_serving(address):
+    with grpc.insecure_channel(address) as channel:
+        response = health_pb2_grpc.HealthStub(channel).Check(health_pb2.HealthCheckRequest(), timeout=1)
+    return response.status == health_pb2.HealthCheckResponse.SERVING
+
+
+def lease_held(address):
+    """True once some node holds the primary lease"""
+    with grpc.insecure_channel(address) as channel:
+        info = next(ledger_pb2_grpc.LedgerServiceStub(channel).WatchPrimary(ledger_pb2.Empty(), timeout=1))
+    return info.epoch > 0
+
+
+def lb_ready(url):
+    root = url.rsplit("/", 1)[0] + "/"
+    with urllib.request.urlopen(root, timeout=1) as response:
+        return response.status == 200
+
+
+def start_standin_env(args):
+    """Spawn stand-in nodes (and the load balancer, for --target lb); returns a cleanup function"""
+    nodes, scratch = start_nodes(args.storage)
+    processes = []
+
+    def cleanup():
+        for process in processes:
+            process.terminate()
+            process.wait()
+        stop_nodes(nodes, scratch)
+
+    try:
+        wait_until(lambda: node_serving(args.grpc), "Stand-in nodes")
+        wait_until(lambda: lease_held(args.grpc), "Primary lease")
+        if args.target == "lb":
+            processes.append(subprocess.Popen(
+                [sys.executable, "load_balancer.py"], cwd=LB_DIR,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            ))
+            wait_until(lambda: lb_ready(args.url), "Load balancer")
+    except BaseException:
+        cleanup()
+        raise
+    return cleanup
+
+
+def print_report(args, result, last_error):
+    load = f"concurrency={args.concurrency}" if args.mode == "closed" else f"rate={args.rate:g}/s ({args.arrivals})"
+    storage = f" storage={args.storage}" if args.standin else ""
+    print(f"\n📊 target={args.target}{storage} mode={args.mode} {load} dist={args.dist} batches={args.batches}")
+    print(f"   {result['ok']} ok, {result['errors']} errors, {result['dropped']} dropped in {result['seconds']}s"
+          f"  →  {result['throughput']} req/s")
+    print("   latency ms  " + "  ".join(f"{k} {v}" for k, v in result["latency_ms"].items()))
+    if last_error is not None:
+        print(f"   last error: {last_error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Closed- and open-loop write benchmark")
+    parser.add_argument("--target", choices=("lb", "grpc"), default="lb", help="through the load balancer or direct gRPC")
+    parser.add_argument("--url", default="http://localhost:8080/record", help="load balancer /record URL")
+    parser.add_argument("--grpc", default="localhost:50051", help="node address for --target grpc")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients in closed-loop mode")
+    parser.add_argument("--rate", type=float, default=500, help="writes per second in open-loop mode")
+    parser.add_argument("--arrivals", choices=("uniform", "poisson"), default="poisson", help="open-loop spacing")
+    parser.add_argument("--max-in-flight", type=int, default=10000, help="open-loop cap before arrivals are dropped")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds before measuring starts")
+    parser.add_argument("--dist", choices=("uniform", "zipf", "sequential"), default="uniform")
+    parser.add_argument("--batches", type=int, default=1000, help="distinct batch IDs for uniform/zipf")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent (higher = more skew)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--standin", action="store_true", help="spawn stand-in nodes (and the load balancer) first")
+    parser.add_argument("--storage", choices=STORAGE_ENGINES, default="memory", help="storage engine of the stand-in nodes")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    cleanup = start_standin_env(args) if args.standin else None
+    try:
+        result, last_error = asyncio.run(run(args))
+    finally:
+        if cleanup:
+            cleanup()
+    if args.json:
+        extra = {"storage": args.storage} if args.standin else {}
+        print(json.dumps({"target": args.target, "mode": args.mode, **extra, **result}))
+    else:
+        print_report(args, result, last_error)
+
+
+if __name__ == "__main__":
+    main()
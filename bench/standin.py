@@ -0,0 +1,66 @@
+"""
+Stand-in cluster for benchmarking without Docker or Mongo.
+
+Starts the real Factory, Distributor and Pharmacy servers (same servicer,
+replication, lease election and grpc.health.v1 as in production) with
+LEDGER_STORAGE switched to an engine that needs no database process:
+"memory" leaves storage out of the measurement so results show the RPC,
+replication and load-balancer path on its own, "log" puts the
+append-only file engine back in. Each run gets a fresh lease file and data
+directory.
+
+    python standin.py [--storage memory|log]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+NODES = ["factory", "distributor", "pharmacy"]
+STORAGE_ENGINES = ("memory", "log")
+
+
+def start_nodes(storage="memory", quiet=True):
+    """Spawn the three node servers; returns (processes, scratch directory to remove afterwards)"""
+    scratch = tempfile.mkdtemp(prefix="ledger-bench-")
+    env = dict(
+        os.environ,
+        LEDGER_STORAGE=storage,
+        LEDGER_DATA_DIR=os.path.join(scratch, "data"),
+        LEDGER_LEASE_FILE=os.path.join(scratch, "primary.lease"),
+    )
+    output = subprocess.DEVNULL if quiet else None  # the nodes print every write
+    processes = [
+        subprocess.Popen([sys.executable, "server.py"], cwd=os.path.join(ROOT, node), env=env,
+                         stdout=output, stderr=output)
+        for node in NODES
+    ]
+    print(f"🧪 Stand-in nodes starting ({storage} storage, scratch {scratch})", flush=True)
+    return processes, scratch
+
+
+def stop_nodes(processes, scratch):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+    shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ledger nodes on a database-free storage engine")
+    parser.add_argument("--storage", choices=STORAGE_ENGINES, default="memory")
+    args = parser.parse_args()
+    processes, scratch = start_nodes(args.storage, quiet=False)
+    try:
+        while all(p.poll() is None for p in processes):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_nodes(processes, scratch)
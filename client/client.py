@@ -1,23 +1,31 @@
 import requests
+import uuid
 
-def record_transaction(batch_id, sender, receiver, status):
-    # Prepare the transaction data
+RETRIES = 2  # resend attempts after a timeout or server error
+
+def record_transaction(batch_id, sender, receiver, status, tx_id=None):
+    # Prepare the transaction data; tx_id makes resending the same payload safe
     payload = {
         "batch_id": batch_id,
         "sender": sender,
         "receiver": receiver,
-        "status": status
+        "status": status,
+        "tx_id": tx_id or uuid.uuid4().hex
     }
 
-    # Send to Load Balancer API instead of direct gRPC
-    try:
-        response = requests.post("http://localhost:8080/record", json=payload)
-        if response.status_code == 200:
-            print(f"✅ {response.json()}")
-        else:
+    # Send to Load Balancer API instead of direct gRPC. Retrying is safe:
+    # the same tx_id is never recorded twice.
+    for attempt in range(RETRIES + 1):
+        try:
+            response = requests.post("http://localhost:8080/record", json=payload, timeout=10)
+            if response.status_code == 200:
+                print(f"✅ {response.json()}")
+                return
             print(f"⚠️ Failed: {response.text}")
-    except Exception as e:
-        print(f"❌ Error connecting to Load Balancer: {e}")
+            if response.status_code < 500:
+                return
+        except Exception as e:
+            print(f"❌ Error connecting to Load Balancer: {e}")
 
 if __name__ == "__main__":
     record_transaction("MED1001", "Factory", "Distributor", "Shipped")
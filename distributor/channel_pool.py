@@ -0,0 +1,139 @@
+"""
+Shared, long-lived gRPC channels keyed by target.
+
+Opening a channel per call pays for a TCP + HTTP/2 handshake every time.
+The pool keeps one channel (and one LedgerService stub) per target, with
+keepalive pings and reconnect backoff, so callers only pay for the RPC.
+Stubs go through ClientMetricsInterceptor, so outgoing calls are timed.
+Each channel also carries a grpc.health.v1 stub for health checks.
+
+The server side of the same settings lives here too: keepalive options
+that match the clients', and a thread pool split between unary calls and
+long-lived streams. A WatchPrimary or Replicate stream holds a server
+thread for its whole life, so StreamSlots caps how many may be open at
+once and the pool has SERVER_WORKERS threads beyond that cap for
+everything else.
+"""
+import os
+import threading
+from concurrent import futures
+from contextlib import contextmanager
+import grpc
+from grpc_health.v1 import health_pb2_grpc
+import ledger_pb2_grpc
+from metrics import ClientMetricsInterceptor
+
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 10000),           # ping idle connections every 10s
+    ("grpc.keepalive_timeout_ms", 5000),         # drop the connection if a ping goes unanswered
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.initial_reconnect_backoff_ms", 200),
+    ("grpc.min_reconnect_backoff_ms", 200),
+    ("grpc.max_reconnect_backoff_ms", 5000),
+]
+
+# Servers must accept the client keepalive pings above, otherwise they
+# answer with GOAWAY "too_many_pings" and the channel keeps reconnecting.
+SERVER_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", 5000),
+]
+SERVER_WORKERS = int(os.environ.get("LEDGER_SERVER_WORKERS", 10))  # threads for unary and short streaming calls
+MAX_STREAMS = int(os.environ.get("LEDGER_MAX_STREAMS", 32))        # WatchPrimary / Replicate streams open at once
+
+
+def server_executor():
+    """Thread pool for a node's gRPC server: SERVER_WORKERS plus one thread per stream slot"""
+    return futures.ThreadPoolExecutor(max_workers=SERVER_WORKERS + MAX_STREAMS)
+
+
+class StreamSlots:
+    """Caps the long-lived streaming RPCs a server holds open"""
+
+    def __init__(self, limit=MAX_STREAMS):
+        self._free = threading.BoundedSemaphore(limit)
+
+    @contextmanager
+    def hold(self, context, method):
+        """Occupy a slot for the life of a stream; RESOURCE_EXHAUSTED if none is free"""
+        if not self._free.acquire(blocking=False):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, f"Too many open streams, retry {method} later")
+        try:
+            yield
+        finally:
+            self._free.release()
+
+
+class ChannelPool:
+    """Thread-safe registry of channels and stubs, one per target"""
+
+    def __init__(self, options=CHANNEL_OPTIONS):
+        self._options = list(options)
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._stubs = {}
+        self._health_stubs = {}
+        self._states = {}
+
+    def _watch(self, target):
+        """Return a connectivity callback that records the state of target"""
+        def on_change(state):
+            self._states[target] = state
+        return on_change
+
+    def channel(self, target):
+        """Get (or lazily open) the shared channel for target"""
+        channel = self._channels.get(target)
+        if channel is None:
+            with self._lock:
+                channel = self._channels.get(target)
+                if channel is None:
+                    channel = grpc.insecure_channel(target, options=self._options)
+                    channel.subscribe(self._watch(target), try_to_connect=True)
+                    intercepted = grpc.intercept_channel(channel, ClientMetricsInterceptor())
+                    self._stubs[target] = ledger_pb2_grpc.LedgerServiceStub(intercepted)
+                    self._health_stubs[target] = health_pb2_grpc.HealthStub(intercepted)
+                    self._channels[target] = channel
+        return channel
+
+    def stub(self, target):
+        """Get the shared LedgerService stub for target"""
+        stub = self._stubs.get(target)
+        if stub is None:
+            self.channel(target)
+            stub = self._stubs[target]
+        return stub
+
+    def health_stub(self, target):
+        """Get the shared grpc.health.v1 Health stub for target"""
+        stub = self._health_stubs.get(target)
+        if stub is None:
+            self.channel(target)
+            stub = self._health_stubs[target]
+        return stub
+
+    def is_ready(self, target):
+        """True if the channel to target is currently connected"""
+        self.channel(target)
+        return self._states.get(target) == grpc.ChannelConnectivity.READY
+
+    def wait_ready(self, target, timeout):
+        """Block until the channel to target is connected, up to timeout seconds"""
+        if self.is_ready(target):
+            return True
+        try:
+            grpc.channel_ready_future(self.channel(target)).result(timeout=timeout)
+            return True
+        except grpc.FutureTimeoutError:
+            return False
+
+    def close(self):
+        """Close every pooled channel"""
+        with self._lock:
+            for channel in self._channels.values():
+                channel.close()
+            self._channels.clear()
+            self._stubs.clear()
+            self._health_stubs.clear()
+            self._states.clear()
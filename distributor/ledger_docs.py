@@ -0,0 +1,210 @@
+"""
+Conversions between ledger protobuf messages and stored documents, plus the
+read and bulk-write helpers shared by every node's LedgerServiceServicer.
+All storage access goes through a LedgerStore (storage.py).
+"""
+import grpc
+import ledger_pb2
+from metrics import MONGO_WRITE_SECONDS, MONGO_WRITE_DOCS
+from storage import DuplicateEntry
+
+STREAM_BATCH_SIZE = 1000  # entries per StreamSince message unless the caller asks otherwise
+LEDGER_FIELDS = ("batch_id", "sender", "receiver", "status")
+
+
+# ---------------------- Conversions ----------------------
+def request_to_doc(request):
+    """Convert a TransactionRequest into a ledger document"""
+    data = {
+        "batch_id": request.batch_id,
+        "sender": request.sender,
+        "receiver": request.receiver,
+        "status": request.status
+    }
+    if request.seq:
+        data["seq"] = request.seq
+    if request.tx_id:
+        data["tx_id"] = request.tx_id
+    return data
+
+
+def doc_to_request(data):
+    """Convert a stored document back into a TransactionRequest"""
+    return ledger_pb2.TransactionRequest(
+        batch_id=data["batch_id"],
+        sender=data["sender"],
+        receiver=data["receiver"],
+        status=data["status"],
+        seq=data.get("seq", 0),
+        tx_id=data.get("tx_id", "")
+    )
+
+
+def doc_to_entry(data):
+    """Convert a stored document into a LedgerEntry"""
+    return ledger_pb2.LedgerEntry(
+        batch_id=data["batch_id"],
+        sender=data["sender"],
+        receiver=data["receiver"],
+        status=data["status"],
+        seq=data.get("seq", 0),
+        tx_id=data.get("tx_id", "")
+    )
+
+
+def entry_to_doc(entry):
+    """Convert a LedgerEntry pulled from another node into a ledger document"""
+    data = {
+        "batch_id": entry.batch_id,
+        "sender": entry.sender,
+        "receiver": entry.receiver,
+        "status": entry.status,
+        "seq": entry.seq
+    }
+    if entry.tx_id:
+        data["tx_id"] = entry.tx_id
+    return data
+
+
+# ---------------------- Idempotency ----------------------
+def find_duplicate(store, tx_id):
+    """Return the stored document for tx_id, or None if it was never recorded"""
+    if not tx_id:
+        return None
+    return store.find_tx(tx_id)
+
+
+def duplicate_response(original, node):
+    """Answer a retried tx_id with the original write instead of writing again"""
+    return ledger_pb2.TransactionResponse(
+        message=f"Already recorded at {node} (duplicate tx_id).",
+        tx_id=original["tx_id"],
+        duplicate=True,
+        seq=original.get("seq", 0)
+    )
+
+
+def split_duplicates(store, batch):
+    """Split a batch into positions to insert and positions already recorded.
+
+    A tx_id repeated within the batch counts as a duplicate after its first
+    occurrence.
+    """
+    tx_ids = [d["tx_id"] for d in batch if d.get("tx_id")]
+    seen = set()
+    if tx_ids:
+        seen = store.existing_tx(tx_ids)
+    fresh, duplicates = [], []
+    for i, data in enumerate(batch):
+        tx_id = data.get("tx_id")
+        if tx_id and tx_id in seen:
+            duplicates.append(i)
+        else:
+            if tx_id:
+                seen.add(tx_id)
+            fresh.append(i)
+    return fresh, duplicates
+
+
+# ---------------------- Writes ----------------------
+def insert_batch(store, batch, indexes, results):
+    """Write one batch with an ordered insert and record a result per item.
+
+    indexes[i] is the position of batch[i] in the caller's stream. Returns
+    the documents that were actually inserted. Ordered inserts stop at the
+    first failing document, so everything after it is reported as not
+    attempted.
+    """
+    MONGO_WRITE_DOCS.observe("bulk", value=len(batch))
+    try:
+        with MONGO_WRITE_SECONDS.time("bulk"):
+            errors = store.insert(batch, ordered=True)
+        inserted = min(errors, default=len(batch))
+        error = str(errors[inserted]) if errors else ""
+    except Exception as e:
+        inserted, error = 0, str(e)
+
+    for i, index in enumerate(indexes):
+        if i < inserted:
+            results.append(ledger_pb2.TransactionResult(index=index, ok=True))
+        elif i == inserted:
+            results.append(ledger_pb2.TransactionResult(index=index, error=error))
+        else:
+            results.append(ledger_pb2.TransactionResult(
+                index=index, error="Not attempted: earlier item in batch failed"
+            ))
+    return batch[:inserted]
+
+
+def record_batch(store, batch, offset, results, stamp):
+    """Dedupe a bulk-ingest batch by tx_id, then insert what is left.
+
+    stamp(docs) assigns sequence numbers to the documents about to be
+    inserted, so duplicates don't consume any. Appends one result per item
+    (duplicates count as ok) and returns the inserted documents.
+    """
+    fresh, duplicates = split_duplicates(store, batch)
+    for i in duplicates:
+        results.append(ledger_pb2.TransactionResult(index=offset + i, ok=True, duplicate=True))
+    docs = [batch[i] for i in fresh]
+    stamp(docs)
+    return insert_batch(store, docs, [offset + i for i in fresh], results)
+
+
+def apply_entries(store, docs):
+    """Idempotently insert replicated documents.
+
+    Uses an unordered insert and ignores duplicates, so entries the node
+    already holds (same seq) are skipped instead of failing the batch.
+    Returns the documents that were newly written.
+    """
+    if not docs:
+        return []
+    MONGO_WRITE_DOCS.observe("apply", value=len(docs))
+    with MONGO_WRITE_SECONDS.time("apply"):
+        errors = store.insert(docs, ordered=False)
+    for error in errors.values():
+        if not isinstance(error, DuplicateEntry):
+            raise error
+    return [d for i, d in enumerate(docs) if i not in errors]
+
+
+# ---------------------- Reads ----------------------
+def batch_history(store, batch_id):
+    """Every entry for one batch in write order (the store keeps a (batch_id, seq) index).
+
+    Entries written before sequencing have no seq and sort first, which is
+    also the order they were written in.
+    """
+    return ledger_pb2.LedgerData(entries=[doc_to_entry(tx) for tx in store.by_batch(batch_id)])
+
+
+def stream_entries(store, query, context):
+    """Yield LedgerEntry messages straight off a store scan, in _id order"""
+    fields = list(query.fields) or list(LEDGER_FIELDS)
+    unknown = set(fields) - set(LEDGER_FIELDS)
+    if unknown:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Unknown fields: {sorted(unknown)}")
+
+    try:
+        cursor = store.scan(query.after_id or None, query.page_size, fields)
+    except ValueError:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid cursor: {query.after_id}")
+    for tx in cursor:
+        yield ledger_pb2.LedgerEntry(
+            entry_id=str(tx["_id"]), seq=tx.get("seq", 0), **{f: tx.get(f, "") for f in fields}
+        )
+
+
+def stream_since(store, seq, batch_size, until=0):
+    """Yield LedgerData chunks holding every entry with a sequence above seq
+    (and up to until, inclusive, when given)"""
+    batch_size = batch_size or STREAM_BATCH_SIZE
+    chunk = []
+    for tx in store.by_seq(seq, until):
+        chunk.append(doc_to_entry(tx))
+        if len(chunk) >= batch_size:
+            yield ledger_pb2.LedgerData(entries=chunk)
+            chunk = []
+    if chunk:
+        yield ledger_pb2.LedgerData(entries=chunk)
@@ -44,6 +44,56 @@ class LedgerServiceStub(object):
                 request_serializer=ledger__pb2.Empty.SerializeToString,
                 response_deserializer=ledger__pb2.LedgerData.FromString,
                 _registered_method=True)
+        self.RecordTransactions = channel.stream_unary(
+                '/LedgerService/RecordTransactions',
+                request_serializer=ledger__pb2.TransactionRequest.SerializeToString,
+                response_deserializer=ledger__pb2.BulkTransactionResponse.FromString,
+                _registered_method=True)
+        self.StreamLedger = channel.unary_stream(
+                '/LedgerService/StreamLedger',
+                request_serializer=ledger__pb2.LedgerQuery.SerializeToString,
+                response_deserializer=ledger__pb2.LedgerEntry.FromString,
+                _registered_method=True)
+        self.Replicate = channel.stream_stream(
+                '/LedgerService/Replicate',
+                request_serializer=ledger__pb2.ReplicationBatch.SerializeToString,
+                response_deserializer=ledger__pb2.ReplicationAck.FromString,
+                _registered_method=True)
+        self.StreamSince = channel.unary_stream(
+                '/LedgerService/StreamSince',
+                request_serializer=ledger__pb2.SinceRequest.SerializeToString,
+                response_deserializer=ledger__pb2.LedgerData.FromString,
+                _registered_method=True)
+        self.GetMerkleNodes = channel.unary_unary(
+                '/LedgerService/GetMerkleNodes',
+                request_serializer=ledger__pb2.MerkleQuery.SerializeToString,
+                response_deserializer=ledger__pb2.MerkleNodes.FromString,
+                _registered_method=True)
+        self.GetBatchHistory = channel.unary_unary(
+                '/LedgerService/GetBatchHistory',
+                request_serializer=ledger__pb2.BatchQuery.SerializeToString,
+                response_deserializer=ledger__pb2.LedgerData.FromString,
+                _registered_method=True)
+        self.GetBatchStatus = channel.unary_unary(
+                '/LedgerService/GetBatchStatus',
+                request_serializer=ledger__pb2.BatchQuery.SerializeToString,
+                response_deserializer=ledger__pb2.BatchStatus.FromString,
+                _registered_method=True)
+        self.GetBatchStatuses = channel.unary_unary(
+                '/LedgerService/GetBatchStatuses',
+                request_serializer=ledger__pb2.BatchStatusQuery.SerializeToString,
+                response_deserializer=ledger__pb2.BatchStatuses.FromString,
+                _registered_method=True)
+        self.GetReplicationStatus = channel.unary_unary(
+                '/LedgerService/GetReplicationStatus',
+                request_serializer=ledger__pb2.Empty.SerializeToString,
+                response_deserializer=ledger__pb2.ReplicationStatus.FromString,
+                _registered_method=True)
+        self.WatchPrimary = channel.unary_stream(
+                '/LedgerService/WatchPrimary',
+                request_serializer=ledger__pb2.Empty.SerializeToString,
+                response_deserializer=ledger__pb2.PrimaryInfo.FromString,
+                _registered_method=True)
 
 
 class LedgerServiceServicer(object):
@@ -61,6 +111,66 @@ class LedgerServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def RecordTransactions(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamLedger(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Replicate(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamSince(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMerkleNodes(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBatchHistory(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBatchStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBatchStatuses(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetReplicationStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchPrimary(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_LedgerServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -74,6 +184,56 @@ def add_LedgerServiceServicer_to_server(servicer, server):
                     request_deserializer=ledger__pb2.Empty.FromString,
                     response_serializer=ledger__pb2.LedgerData.SerializeToString,
             ),
+            'RecordTransactions': grpc.stream_unary_rpc_method_handler(
+                    servicer.RecordTransactions,
+                    request_deserializer=ledger__pb2.TransactionRequest.FromString,
+                    response_serializer=ledger__pb2.BulkTransactionResponse.SerializeToString,
+            ),
+            'StreamLedger': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamLedger,
+                    request_deserializer=ledger__pb2.LedgerQuery.FromString,
+                    response_serializer=ledger__pb2.LedgerEntry.SerializeToString,
+            ),
+            'Replicate': grpc.stream_stream_rpc_method_handler(
+                    servicer.Replicate,
+                    request_deserializer=ledger__pb2.ReplicationBatch.FromString,
+                    response_serializer=ledger__pb2.ReplicationAck.SerializeToString,
+            ),
+            'StreamSince': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamSince,
+                    request_deserializer=ledger__pb2.SinceRequest.FromString,
+                    response_serializer=ledger__pb2.LedgerData.SerializeToString,
+            ),
+            'GetMerkleNodes': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMerkleNodes,
+                    request_deserializer=ledger__pb2.MerkleQuery.FromString,
+                    response_serializer=ledger__pb2.MerkleNodes.SerializeToString,
+            ),
+            'GetBatchHistory': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBatchHistory,
+                    request_deserializer=ledger__pb2.BatchQuery.FromString,
+                    response_serializer=ledger__pb2.LedgerData.SerializeToString,
+            ),
+            'GetBatchStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBatchStatus,
+                    request_deserializer=ledger__pb2.BatchQuery.FromString,
+                    response_serializer=ledger__pb2.BatchStatus.SerializeToString,
+            ),
+            'GetBatchStatuses': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBatchStatuses,
+                    request_deserializer=ledger__pb2.BatchStatusQuery.FromString,
+                    response_serializer=ledger__pb2.BatchStatuses.SerializeToString,
+            ),
+            'GetReplicationStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetReplicationStatus,
+                    request_deserializer=ledger__pb2.Empty.FromString,
+                    response_serializer=ledger__pb2.ReplicationStatus.SerializeToString,
+            ),
+            'WatchPrimary': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchPrimary,
+                    request_deserializer=ledger__pb2.Empty.FromString,
+                    response_serializer=ledger__pb2.PrimaryInfo.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'LedgerService', rpc_method_handlers)
@@ -138,3 +298,273 @@ class LedgerService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def RecordTransactions(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/LedgerService/RecordTransactions',
+            ledger__pb2.TransactionRequest.SerializeToString,
+            ledger__pb2.BulkTransactionResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamLedger(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/LedgerService/StreamLedger',
+            ledger__pb2.LedgerQuery.SerializeToString,
+            ledger__pb2.LedgerEntry.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Replicate(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/LedgerService/Replicate',
+            ledger__pb2.ReplicationBatch.SerializeToString,
+            ledger__pb2.ReplicationAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamSince(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/LedgerService/StreamSince',
+            ledger__pb2.SinceRequest.SerializeToString,
+            ledger__pb2.LedgerData.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMerkleNodes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/LedgerService/GetMerkleNodes',
+            ledger__pb2.MerkleQuery.SerializeToString,
+            ledger__pb2.MerkleNodes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetBatchHistory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/LedgerService/GetBatchHistory',
+            ledger__pb2.BatchQuery.SerializeToString,
+            ledger__pb2.LedgerData.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetBatchStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/LedgerService/GetBatchStatus',
+            ledger__pb2.BatchQuery.SerializeToString,
+            ledger__pb2.BatchStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetBatchStatuses(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/LedgerService/GetBatchStatuses',
+            ledger__pb2.BatchStatusQuery.SerializeToString,
+            ledger__pb2.BatchStatuses.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetReplicationStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/LedgerService/GetReplicationStatus',
+            ledger__pb2.Empty.SerializeToString,
+            ledger__pb2.ReplicationStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchPrimary(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/LedgerService/WatchPrimary',
+            ledger__pb2.Empty.SerializeToString,
+            ledger__pb2.PrimaryInfo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
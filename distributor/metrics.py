@@ -0,0 +1,294 @@
+"""
+Process-wide metrics in Prometheus text format.
+
+Counters, gauges and histograms live in one registry and are rendered by
+render() for a /metrics endpoint. Server and client gRPC interceptors
+record per-method latency, in-flight calls and status codes; the ledger
+code adds Mongo write and replication fan-out timings. Recording is a
+dict lookup, a bisect and a few additions under a short lock, so it is
+cheap enough for every RPC.
+
+Nodes without a web framework expose /metrics (and any other read-only
+JSON pages) through serve_http, a small stdlib HTTP server thread.
+"""
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import grpc
+
+# Latency buckets in seconds: 0.5 ms … 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    """One metric family; children are keyed by their label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _label_text(self, values, extra=()):
+        pairs = list(zip(self.labels, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{self._label_text(values)} {value}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._values.get(labels)
+            if child is None:
+                child = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            child[0][i] += 1
+            child[1] += value
+            child[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - start)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        for values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{self._label_text(values, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {total}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render():
+    """Every registered metric in Prometheus text exposition format"""
+    lines = []
+    for metric in list(REGISTRY):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def serve_http(port, routes):
+    """Serve GET routes on port from a daemon thread.
+
+    routes maps a path to a callable returning (content_type, body); a
+    body that isn't str is sent as JSON.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            route = routes.get(self.path.split("?", 1)[0])
+            if route is None:
+                self.send_error(404)
+                return
+            content_type, body = route()
+            if not isinstance(body, str):
+                content_type, body = "application/json", json.dumps(body)
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass  # scraped every few seconds; keep the node's log readable
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"http-{port}", daemon=True).start()
+    return server
+
+
+def metrics_route():
+    return CONTENT_TYPE, render()
+
+
+# ---------------------- Metric families ----------------------
+SERVER_SECONDS = Histogram("grpc_server_handling_seconds", "Time to handle an RPC, per method", ["method"])
+SERVER_IN_FLIGHT = Gauge("grpc_server_in_flight", "RPCs currently being handled", ["method"])
+SERVER_HANDLED = Counter("grpc_server_handled_total", "RPCs completed, by status code", ["method", "code"])
+CLIENT_SECONDS = Histogram("grpc_client_handling_seconds", "Time until an outgoing RPC completed", ["method"])
+CLIENT_HANDLED = Counter("grpc_client_handled_total", "Outgoing RPCs completed, by status code", ["method", "code"])
+MONGO_WRITE_SECONDS = Histogram("ledger_mongo_write_seconds", "Time spent in Mongo ledger writes", ["op"])
+MONGO_WRITE_DOCS = Histogram("ledger_mongo_write_docs", "Documents per Mongo ledger write", ["op"], SIZE_BUCKETS)
+REPLICATION_SECONDS = Histogram(
+    "ledger_replication_fanout_seconds", "Time from enqueueing a write to a replica's ack", ["replica"]
+)
+
+
+def short_method(full_method):
+    """'/LedgerService/GetLedger' → 'GetLedger'"""
+    return full_method.rsplit("/", 1)[-1]
+
+
+# ---------------------- Server interceptor ----------------------
+class ServerMetricsInterceptor(grpc.ServerInterceptor):
+    """Times every handled RPC and counts it by status code.
+
+    Streaming responses are timed until the stream is exhausted.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = short_method(handler_call_details.method)
+
+        def finish(start, context, error=None):
+            code = _status_of(context, error)
+            SERVER_IN_FLIGHT.dec(method)
+            SERVER_SECONDS.observe(method, value=time.perf_counter() - start)
+            SERVER_HANDLED.inc(method, code)
+
+        def unary(behavior):
+            def wrapper(request_or_iterator, context):
+                SERVER_IN_FLIGHT.inc(method)
+                start = time.perf_counter()
+                try:
+                    response = behavior(request_or_iterator, context)
+                except BaseException as e:
+                    finish(start, context, e)
+                    raise
+                finish(start, context)
+                return response
+            return wrapper
+
+        def streaming(behavior):
+            def wrapper(request_or_iterator, context):
+                SERVER_IN_FLIGHT.inc(method)
+                start = time.perf_counter()
+                try:
+                    yield from behavior(request_or_iterator, context)
+                except BaseException as e:
+                    finish(start, context, e)
+                    raise
+                finish(start, context)
+            return wrapper
+
+        if handler.unary_unary:
+            factory, behavior, wrap = grpc.unary_unary_rpc_method_handler, handler.unary_unary, unary
+        elif handler.unary_stream:
+            factory, behavior, wrap = grpc.unary_stream_rpc_method_handler, handler.unary_stream, streaming
+        elif handler.stream_unary:
+            factory, behavior, wrap = grpc.stream_unary_rpc_method_handler, handler.stream_unary, unary
+        else:
+            factory, behavior, wrap = grpc.stream_stream_rpc_method_handler, handler.stream_stream, streaming
+        return factory(
+            wrap(behavior),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+
+
+def _status_of(context, error):
+    code = context.code() if hasattr(context, "code") else None
+    if code is None and isinstance(error, GeneratorExit):
+        code = grpc.StatusCode.CANCELLED  # client went away mid-stream
+    elif code is None and error is not None:
+        code = grpc.StatusCode.UNKNOWN
+    if code is None:
+        return "OK"
+    return code.name if isinstance(code, grpc.StatusCode) else str(code)
+
+
+# ---------------------- Client interceptors ----------------------
+class ClientMetricsInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
+    """Times outgoing unary calls (until the response) and server streams (until the call ends)"""
+
+    def _record(self, method, start):
+        def done(call):
+            code = call.code()
+            CLIENT_SECONDS.observe(method, value=time.perf_counter() - start)
+            CLIENT_HANDLED.inc(method, code.name if code else "UNKNOWN")
+        return done
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        start = time.perf_counter()
+        call = continuation(client_call_details, request)
+        call.add_done_callback(self._record(short_method(client_call_details.method), start))
+        return call
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        start = time.perf_counter()
+        call = continuation(client_call_details, request)
+        call.add_done_callback(self._record(short_method(client_call_details.method), start))
+        return call
+
+
+class AioClientMetricsInterceptor(grpc.aio.UnaryUnaryClientInterceptor):
+    """ClientMetricsInterceptor for grpc.aio channels (unary calls)"""
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        method = short_method(
+            client_call_details.method.decode()
+            if isinstance(client_call_details.method, bytes) else client_call_details.method
+        )
+        start = time.perf_counter()
+        call = await continuation(client_call_details, request)
+        try:
+            await call
+        finally:
+            code = await call.code()
+            CLIENT_SECONDS.observe(method, value=time.perf_counter() - start)
+            CLIENT_HANDLED.inc(method, code.name if code else "UNKNOWN")
+        return call
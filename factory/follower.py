@@ -0,0 +1,212 @@
+"""
+Follower side of replication, run by every node.
+
+The node holding the primary lease streams its writes to the others
+(replication.py); they apply those batches in Replicate. In the background
+a follower pulls whatever it missed from the lease holder over StreamSince
+(catch-up) and repairs ranges whose Merkle hashes differ from the holder's
+(anti-entropy). The sync source is read from the lease, so after a
+failover every node follows the new primary, a lease change triggers an
+immediate catch-up, and the node holding the lease syncs from nobody.
+
+Before a node takes the lease it catches up from the most advanced
+reachable peer (LeaseManager's prepare hook), so it never hands out
+sequence numbers that already exist elsewhere.
+"""
+import threading
+import time
+import ledger_pb2
+from ledger_docs import request_to_doc, entry_to_doc, apply_entries
+from lease import PEER_TIMEOUT, peer_heads
+from merkle import diff_ranges
+
+CATCHUP_INTERVAL = 30      # seconds between incremental catch-up pulls from the lease holder
+CATCHUP_BATCH_SIZE = 5000  # entries per StreamSince message
+ANTI_ENTROPY_INTERVAL = 60  # seconds between Merkle comparisons with the lease holder
+
+
+def fetch_range(stub, after, until):
+    """The remote entries with after < seq <= until, keyed by seq"""
+    request = ledger_pb2.SinceRequest(seq=after, until_seq=until)
+    return {e.seq: entry_to_doc(e) for chunk in stub.StreamSince(request) for e in chunk.entries}
+
+
+def same_entry(doc, theirs):
+    return theirs is not None and all(doc.get(f) == theirs[f] for f in theirs)
+
+
+class Follower:
+    """Keeps one node's ledger in line with whichever node holds the lease"""
+
+    def __init__(self, node, target, label):
+        self.node = node      # the node's servicer (store, seq, tree, lease, pool, replication, ...)
+        self.target = target  # this node, as named in the lease
+        self.label = label    # e.g. "🚚 Distributor", for log lines
+        self.applied = {}     # replication session -> highest batch seq applied
+        state = node.store.get_meta("catch_up")
+        self.synced = state["synced_seq"] if state else 0  # every seq up to here is present
+        self._wake = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._catch_up_loop, name="catch-up", daemon=True).start()
+        threading.Thread(target=self._anti_entropy_loop, name="anti-entropy", daemon=True).start()
+        threading.Thread(target=self._follow_lease, name="follow-lease", daemon=True).start()
+
+    def source(self):
+        """The current lease holder to sync from, or None while this node holds the lease"""
+        lease = self.node.lease.lease
+        if lease is None or lease.holder == self.target or self.node.lease.is_primary():
+            return None
+        return lease.holder
+
+    def _apply(self, docs):
+        """Insert entries that aren't here yet and fold them into the node's views"""
+        node = self.node
+        inserted = apply_entries(node.store, docs)
+        node.written(inserted)
+        top = max((d["seq"] for d in docs), default=0)
+        node.seq.observe(top)
+        node.replication.advance(top)
+        return inserted
+
+    # ----------- Replicate -----------
+    def replicate(self, request_iterator, context):
+        """Apply sequenced batches from the primary and ack the highest one applied"""
+        node = self.node
+        for batch in request_iterator:
+            applied = self.applied.get(batch.session, 0)
+            if batch.seq <= applied:
+                # Resent after a reconnect; already applied
+                yield ledger_pb2.ReplicationAck(session=batch.session, seq=applied)
+                continue
+            # Writes a deposed primary accepted after losing its lease are dropped
+            entries = [r for r in batch.entries if not node.lease.is_fenced(r.epoch, batch.source)]
+            if len(entries) < len(batch.entries):
+                print(f"🚫 Dropped {len(batch.entries) - len(entries)} entries from {batch.source}: stale epoch")
+            start = time.time()
+            try:
+                self._apply([request_to_doc(r) for r in entries])
+            except Exception as e:
+                yield ledger_pb2.ReplicationAck(session=batch.session, seq=applied, error=str(e))
+                return
+            self.applied[batch.session] = batch.seq
+            end = time.time()
+            for r in entries:
+                if r.trace_id:
+                    node.tracer.record(r.trace_id, "replicate_apply", start, end, seq=r.seq, batch_entries=len(batch.entries))
+            print(f"{self.label} applied batch {batch.seq} from {batch.source} ({len(batch.entries)} entries)")
+            yield ledger_pb2.ReplicationAck(session=batch.session, seq=batch.seq)
+
+    # ----------- Catch-up -----------
+    def catch_up(self, source=None):
+        """Pull the entries this node missed from source (default: the lease holder) via StreamSince.
+
+        If every sequence between the synced watermark and the local head is
+        present, only the tail after the head is requested; otherwise the pull
+        restarts from the watermark and duplicates are skipped on insert.
+        """
+        source = source or self.source()
+        if source is None:
+            return
+        node = self.node
+        head = node.seq.last
+        present = node.store.count_seq(self.synced, head)
+        since = head if present == head - self.synced else self.synced
+
+        stub = node.pool.stub(source)
+        pulled, last = 0, since
+        for chunk in stub.StreamSince(ledger_pb2.SinceRequest(seq=since, batch_size=CATCHUP_BATCH_SIZE)):
+            pulled += len(self._apply([entry_to_doc(e) for e in chunk.entries]))
+            last = chunk.entries[-1].seq
+
+        self.synced = last
+        node.store.set_meta("catch_up", {"synced_seq": last})
+        if pulled:
+            print(f"{self.label} caught up {pulled} missed entries from {source}")
+
+    def catch_up_to_peers(self):
+        """Catch up from the most advanced reachable peer if it is ahead of this node"""
+        best = max(peer_heads(self.node.pool, self.target), key=lambda p: p[1], default=None)
+        if best is not None and best[1] > self.node.seq.last:
+            self.catch_up(best[0])
+
+    # ----------- Anti-entropy -----------
+    def anti_entropy(self):
+        """Compare Merkle trees with the lease holder and repair the ranges that differ"""
+        source = self.source()
+        if source is None:
+            return
+        stub = self.node.pool.stub(source)
+
+        def fetch_remote(level, indices):
+            return stub.GetMerkleNodes(ledger_pb2.MerkleQuery(level=level, indices=indices)).hashes
+
+        ranges = diff_ranges(self.node.tree, fetch_remote)
+        for lo, hi in ranges:
+            self.repair_range(stub, source, lo, hi)
+        if ranges:
+            print(f"{self.label} repaired {len(ranges)} divergent range(s) from {source}")
+
+    def repair_range(self, stub, source, lo, hi):
+        """Make sequences [lo, hi) match source: drop extras, insert what's missing.
+
+        The range is capped at source's head when the repair starts, so
+        entries it commits meanwhile are never touched. A local entry is
+        only dropped if a second read of source, taken after the local scan,
+        still disagrees with it and source still holds the lease.
+        """
+        node = self.node
+        head = stub.GetReplicationStatus(ledger_pb2.Empty(), timeout=PEER_TIMEOUT).head_seq
+        after = max(lo, 1) - 1
+        until = min(hi - 1, head) if hi else head
+        if until <= after:
+            return
+        remote = fetch_range(stub, after, until)
+
+        stale = []
+        for doc in node.store.by_seq(after, until):
+            if same_entry(doc, remote.get(doc["seq"])):
+                del remote[doc["seq"]]  # identical on both sides
+            else:
+                stale.append(doc)
+
+        if stale:
+            # Whatever is stored here reached source before the scan, so a fresh read settles it
+            again = fetch_range(stub, after, until)
+            stale = [d for d in stale if not same_entry(d, again.get(d["seq"]))]
+        if stale and self.source() != source:
+            print(f"⚠️ {source} no longer holds the lease; keeping {len(stale)} divergent entries")
+            stale = []
+        if stale:
+            node.store.delete(stale)
+            node.tree.remove_all(stale)
+            node.ledger_cache.invalidate()
+        self._apply(list(remote.values()))
+        if stale:
+            node.status.recompute(d["batch_id"] for d in stale)
+
+    # ----------- Background loops -----------
+    def _catch_up_loop(self):
+        """Run catch_up on startup, every CATCHUP_INTERVAL seconds and whenever the lease moves"""
+        while True:
+            self._wake.clear()
+            try:
+                self.catch_up()
+            except Exception as e:
+                print(f"⚠️ Catch-up failed: {e}")
+            self._wake.wait(CATCHUP_INTERVAL)
+
+    def _anti_entropy_loop(self):
+        """Run anti_entropy every ANTI_ENTROPY_INTERVAL seconds"""
+        while True:
+            time.sleep(ANTI_ENTROPY_INTERVAL)
+            try:
+                self.anti_entropy()
+            except Exception as e:
+                print(f"⚠️ Anti-entropy failed: {e}")
+
+    def _follow_lease(self):
+        """Wake the catch-up loop as soon as another node takes the lease"""
+        for lease in self.node.lease.watch(lambda: True):
+            if lease.holder != self.target:
+                self._wake.set()
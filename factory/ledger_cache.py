@@ -0,0 +1,99 @@
+"""
+Cache of the encoded GetLedger response.
+
+A repeated protobuf field is just its elements' encodings laid end to end,
+so the bytes of LedgerData(entries=a + b) are the bytes for a followed by
+the bytes for b. The cache builds the full encoding once, on the first
+GetLedger, and every write afterwards appends the encoding of only the new
+entries. GetLedger is then served by a raw-bytes handler that skips
+protobuf serialization entirely: one copy of the buffer per call.
+
+Deleting entries (anti-entropy repair) invalidates the cache; it is
+rebuilt on the next read. Entries are keyed by seq so one that is both
+picked up by a rebuild and appended by the write that inserted it is only
+encoded once.
+"""
+import threading
+import grpc
+import ledger_pb2
+from ledger_docs import STREAM_BATCH_SIZE, doc_to_entry
+
+
+def encode_entries(docs):
+    """Wire encoding of LedgerData holding docs; concatenations of these are valid LedgerData"""
+    return ledger_pb2.LedgerData(entries=[doc_to_entry(d) for d in docs]).SerializeToString()
+
+
+class LedgerCache:
+    """Encoded LedgerData for the whole ledger, extended in place on every write"""
+
+    def __init__(self, store):
+        self.store = store
+        self._buf = None       # bytearray once built
+        self._seqs = set()     # seqs already encoded into _buf
+        self._pending = None   # writes that land while a build is scanning
+        self._generation = 0   # bumped by invalidate() so a racing build is discarded
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def append(self, docs):
+        """Account for newly written documents"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(docs)
+            elif self._buf is not None:
+                self._extend(docs)
+
+    def invalidate(self):
+        """Drop the cache after entries were deleted or rewritten"""
+        with self._lock:
+            self._buf, self._seqs = None, set()
+            self._generation += 1
+
+    def _extend(self, docs):
+        fresh = [d for d in docs if not d.get("seq") or d["seq"] not in self._seqs]
+        if fresh:
+            self._seqs.update(d["seq"] for d in fresh if d.get("seq"))
+            self._buf += encode_entries(fresh)
+
+    def encoded(self):
+        """The serialized GetLedger response, building it first if needed"""
+        with self._lock:
+            if self._buf is not None:
+                return bytes(self._buf)
+        with self._build_lock:
+            with self._lock:
+                if self._buf is not None:
+                    return bytes(self._buf)
+                generation, self._pending = self._generation, []
+            buf, seqs, chunk = bytearray(), set(), []
+            for doc in self.store.scan():
+                chunk.append(doc)
+                if doc.get("seq"):
+                    seqs.add(doc["seq"])
+                if len(chunk) >= STREAM_BATCH_SIZE:
+                    buf += encode_entries(chunk)
+                    chunk = []
+            buf += encode_entries(chunk)
+            with self._lock:
+                pending, self._pending = self._pending, None
+                if generation != self._generation:
+                    return bytes(buf)  # invalidated mid-scan; serve this one read uncached
+                self._buf, self._seqs = buf, seqs
+                self._extend(pending)
+                return bytes(self._buf)
+
+
+def add_cached_ledger_handler(server, cache):
+    """Serve GetLedger straight from the cache's bytes.
+
+    The handler has no response serializer, so gRPC sends the returned bytes
+    as they are. Registered method handlers are matched before generic ones,
+    so this has to be called after add_LedgerServiceServicer_to_server to
+    replace the servicer's GetLedger registration.
+    """
+    handler = grpc.unary_unary_rpc_method_handler(
+        lambda request, context: cache.encoded(),
+        request_deserializer=ledger_pb2.Empty.FromString,
+    )
+    server.add_registered_method_handlers("LedgerService", {"GetLedger": handler})
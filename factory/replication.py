@@ -0,0 +1,427 @@
+"""
+Bounded, streaming replication queue for the primary.
+
+Every node runs one to the other lease candidates; only the node holding
+the lease accepts client writes, so only its lanes carry entries.
+
+Every replica gets its own lane: a bounded queue drained by one long-lived
+Replicate stream. The lane packs queued entries into sequenced batches,
+keeps up to a window of them in flight and retires them when the replica
+acks the highest sequence it has applied. If the stream breaks, unacked
+batches are resent on the next stream, so nothing is lost while the replica
+is briefly unavailable.
+
+A slow pharmacy only backs up its own lane and never stalls delivery to the
+distributor. Producers call wait_for_capacity() before writing; it blocks
+while a reachable replica's lane is above the high-water mark, which pushes
+back on clients instead of piling up work.
+
+Lag is measured against the ledger sequence: each lane remembers the
+highest seq its replica has acked, and the queue remembers when each seq
+was handed over, so lag is reported both in sequence numbers and in
+seconds since the oldest write the replica has not acked. A lane learns
+its replica's position from the replica's own ledger head each time the
+stream (re)opens, and from acks after that; until it knows, and whenever
+the age of the oldest missing write is unknown (entries from before this
+queue, or from another primary), the replica's lag is reported as
+infinite so bounded-staleness reads skip it.
+
+Writes choose a consistency mode: "eventual" acks after the local write,
+"quorum" waits for WRITE_QUORUM replica acks and "all" for every replica.
+Callers can override the mode per request with the x-consistency metadata
+key.
+"""
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent import futures
+from concurrent.futures import Future
+from itertools import count
+import grpc
+import ledger_pb2
+from metrics import REPLICATION_SECONDS
+
+RECONNECT_BACKOFF = 0.5      # seconds before reopening a broken stream
+MAX_RECONNECT_BACKOFF = 5
+IDLE_POLL = 0.2              # how often an idle request generator checks for shutdown
+TIMELINE_SIZE = 100000       # enqueue timestamps kept for lag_seconds
+
+# Queue tuning
+REPLICATION_BATCH_SIZE = int(os.environ.get("REPLICATION_BATCH_SIZE", 500))   # max entries per Replicate batch
+REPLICATION_WINDOW = int(os.environ.get("REPLICATION_WINDOW", 8))              # unacked batches in flight per replica
+REPLICATION_QUEUE_SIZE = int(os.environ.get("REPLICATION_QUEUE_SIZE", 10000))  # batches per lane before dropping
+REPLICATION_HIGH_WATER = int(os.environ.get("REPLICATION_HIGH_WATER", 8000))   # lane depth that blocks writers
+BACKPRESSURE_TIMEOUT = 5     # seconds a writer waits for queue space before giving up
+
+# Consistency
+CONSISTENCY_MODES = ("eventual", "quorum", "all")
+CONSISTENCY = os.environ.get("LEDGER_CONSISTENCY", "eventual")
+WRITE_QUORUM = int(os.environ.get("LEDGER_WRITE_QUORUM", 1))
+REPLICATION_TIMEOUT = float(os.environ.get("LEDGER_REPLICATION_TIMEOUT", 2))  # seconds to wait for replica acks
+
+
+def all_of(acks):
+    """Combine ack futures into one that resolves once all of them have.
+
+    Fails as soon as any of them fails.
+    """
+    combined, lock, remaining = Future(), threading.Lock(), [len(acks)]
+
+    def on_done(ack):
+        with lock:
+            if combined.done():
+                return
+            if ack.exception() is not None:
+                combined.set_exception(ack.exception())
+                return
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                combined.set_result(None)
+
+    if not acks:
+        combined.set_result(None)
+    for ack in acks:
+        ack.add_done_callback(on_done)
+    return combined
+
+
+class ReplicationLane:
+    """Delivers queued entries to one replica over a Replicate stream"""
+
+    def __init__(self, target, session, open_stream, capacity, batch_size, window, on_progress, probe=None, source=""):
+        self.target = target
+        self._session = session
+        self._source = source  # this primary's target, stamped on every batch
+        self._open_stream = open_stream    # callable(target, request_iterator) -> ack iterator
+        self._probe = probe                # callable(target) -> replica's ledger head, or None
+        self._queue = queue.Queue(maxsize=capacity)
+        self._batch_size = batch_size
+        self._window = window
+        self._on_progress = on_progress
+        self._lock = threading.Condition()
+        self._outstanding = OrderedDict()  # item id -> (enqueued_at, size, ack future), oldest first
+        self._unacked = OrderedDict()      # batch seq -> (item ids, entries), oldest first
+        self._ids = count()
+        self._seqs = count(1)
+        self.pending_entries = 0
+        self.acked_seq = 0              # highest ReplicationBatch seq acked
+        self.acked_position = None      # highest ledger seq the replica has; None until known
+        self.replicated = 0
+        self.dropped = 0
+        self.reachable = True
+        self.last_success = None
+
+        threading.Thread(target=self._run, name=f"replicate-{target}", daemon=True).start()
+
+    def depth(self):
+        """Number of batches waiting in this lane"""
+        return self._queue.qsize()
+
+    def put(self, entries):
+        """Queue TransactionRequests for delivery; drops them if the lane is full.
+
+        Returns a Future that resolves once the replica has acked the entries.
+        """
+        item_id, acked = next(self._ids), Future()
+        with self._lock:
+            self._outstanding[item_id] = (time.time(), len(entries), acked)
+            self.pending_entries += len(entries)
+        try:
+            self._queue.put_nowait((item_id, entries))
+        except queue.Full:
+            with self._lock:
+                self.dropped += len(entries)
+            self._finish([item_id], error=RuntimeError(f"replication lane for {self.target} full"))
+            print(f"⚠️ Replication lane for {self.target} full, dropped {len(entries)} entries")
+        return acked
+
+    def _finish(self, item_ids, error=None):
+        with self._lock:
+            done = []
+            for item_id in item_ids:
+                _, size, acked = self._outstanding.pop(item_id)
+                self.pending_entries -= size
+                done.append(acked)
+        for acked in done:
+            if error is None:
+                acked.set_result(self.target)
+            else:
+                acked.set_exception(error)
+        self._on_progress()
+
+    # ----------- stream handling -----------
+    def _next_batch(self, alive):
+        """Pack queued items into one ReplicationBatch, or None if the stream died"""
+        with self._lock:
+            self._lock.wait_for(lambda: len(self._unacked) < self._window or not alive.is_set())
+        while alive.is_set():
+            try:
+                item_id, entries = self._queue.get(timeout=IDLE_POLL)
+                break
+            except queue.Empty:
+                continue
+        else:
+            return None
+
+        item_ids, batch = [item_id], list(entries)
+        while len(batch) < self._batch_size:
+            try:
+                item_id, entries = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            item_ids.append(item_id)
+            batch.extend(entries)
+
+        seq = next(self._seqs)
+        with self._lock:
+            self._unacked[seq] = (item_ids, batch)
+        return ledger_pb2.ReplicationBatch(session=self._session, seq=seq, entries=batch, source=self._source)
+
+    def _requests(self, alive):
+        """Request generator: resend unacked batches, then stream new ones"""
+        with self._lock:
+            resend = [(seq, batch) for seq, (_, batch) in self._unacked.items()]
+        for seq, batch in resend:
+            yield ledger_pb2.ReplicationBatch(session=self._session, seq=seq, entries=batch, source=self._source)
+        while True:
+            batch = self._next_batch(alive)
+            if batch is None:
+                return
+            yield batch
+
+    def _ack(self, seq):
+        """Retire every batch up to and including seq"""
+        done, entries = [], 0
+        with self._lock:
+            while self._unacked and next(iter(self._unacked)) <= seq:
+                _, (item_ids, batch) = self._unacked.popitem(last=False)
+                done.extend(item_ids)
+                entries += len(batch)
+                self.acked_position = max(self.acked_position or 0, max((e.seq for e in batch), default=0))
+            self.acked_seq = max(self.acked_seq, seq)
+            self.replicated += entries
+            self.last_success = time.time()
+            self._lock.notify_all()
+        if done:
+            self._finish(done)
+
+    def _seed(self):
+        """Take the replica's current ledger head as its position, if it can be reached"""
+        if self._probe is None:
+            return
+        try:
+            head = self._probe(self.target)
+        except Exception:
+            return
+        with self._lock:
+            self.acked_position = head
+            self.reachable = True
+
+    def _run(self):
+        backoff = RECONNECT_BACKOFF
+        while True:
+            alive = threading.Event()
+            alive.set()
+            try:
+                acks = self._open_stream(self.target, self._requests(alive))
+                self._seed()
+                for ack in acks:
+                    self.reachable = True
+                    backoff = RECONNECT_BACKOFF
+                    self._ack(ack.seq)
+                    if ack.error:
+                        raise RuntimeError(ack.error)
+            except Exception as e:
+                self.reachable = False
+                print(f"⚠️ Replication stream to {self.target} failed: {e}")
+            finally:
+                alive.clear()
+                with self._lock:
+                    self._lock.notify_all()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, MAX_RECONNECT_BACKOFF)
+
+    def stats(self):
+        """Queue depth and delivery counters for this replica (lag comes from ReplicationQueue)"""
+        with self._lock:
+            return {
+                "target": self.target,
+                "queue_depth": self.depth(),
+                "in_flight_batches": len(self._unacked),
+                "acked_batch": self.acked_seq,
+                "acked_seq": self.acked_position,
+                "pending_entries": self.pending_entries,
+                "replicated": self.replicated,
+                "dropped": self.dropped,
+                "reachable": self.reachable,
+            }
+
+
+class ReplicationQueue:
+    """One ReplicationLane per replica plus producer-side backpressure"""
+
+    def __init__(self, targets, open_stream, capacity=REPLICATION_QUEUE_SIZE, high_water=REPLICATION_HIGH_WATER,
+                 batch_size=REPLICATION_BATCH_SIZE, window=REPLICATION_WINDOW, head=0, source="", probe=None):
+        """head is the ledger's last seq at startup; probe(target) returns a
+        replica's ledger head and seeds its lane's position on every connect"""
+        self.high_water = high_water
+        self.session = uuid.uuid4().hex
+        self.head = head                               # highest ledger seq handed to the lanes
+        self._timeline = deque(maxlen=TIMELINE_SIZE)   # (seq, enqueued_at), oldest first
+        self._timeline_lock = threading.Lock()
+        self._space = threading.Condition()
+        self.lanes = [
+            ReplicationLane(t, self.session, open_stream, capacity, batch_size, window, self._notify, probe, source)
+            for t in targets
+        ]
+
+    def _notify(self):
+        with self._space:
+            self._space.notify_all()
+
+    def saturated(self):
+        """True while a reachable lane is over the high-water mark"""
+        # Unreachable replicas don't push back: their lane drops entries
+        # instead of blocking every write until they come back.
+        return any(l.reachable and l.depth() >= self.high_water for l in self.lanes)
+
+    def wait_for_capacity(self, timeout):
+        """Block while any reachable lane is over the high-water mark.
+
+        Returns False if there is still no room after timeout seconds.
+        """
+        with self._space:
+            return self._space.wait_for(lambda: not self.saturated(), timeout=timeout)
+
+    def enqueue(self, entries):
+        """Hand TransactionRequests for already-committed writes to every lane.
+
+        Returns one ack Future per replica.
+        """
+        top = max((e.seq for e in entries), default=0)
+        with self._timeline_lock:
+            if top > self.head:
+                self.head = top
+                self._timeline.append((top, time.time()))
+        start = time.perf_counter()
+        acks = []
+        for lane in self.lanes:
+            ack = lane.put(entries)
+            ack.add_done_callback(self._timer(lane.target, start))
+            acks.append(ack)
+        return acks
+
+    def advance(self, seq):
+        """Raise head to seq for entries this node received from another primary"""
+        with self._timeline_lock:
+            self.head = max(self.head, seq)
+
+    @staticmethod
+    def _timer(target, start):
+        def done(ack):
+            if ack.exception() is None:
+                REPLICATION_SECONDS.observe(target, value=time.perf_counter() - start)
+        return done
+
+    def depth(self):
+        """Total batches waiting across all lanes"""
+        return sum(l.depth() for l in self.lanes)
+
+    def lag(self, lane):
+        """(entries, seconds) the replica behind lane is behind the primary.
+
+        Entries are counted in sequence numbers; seconds run from when the
+        oldest write the replica hasn't acked was handed to the lanes, and
+        are None while that is unknown.
+        """
+        position = lane.acked_position
+        if position is None:
+            return self.head, None
+        with self._timeline_lock:
+            # Forget writes every replica has acked
+            floor = min(l.acked_position or 0 for l in self.lanes)
+            while self._timeline and self._timeline[0][0] <= floor:
+                self._timeline.popleft()
+            behind = max(0, self.head - position)
+            oldest = next((t for seq, t in self._timeline if seq > position), None)
+        if not behind:
+            return 0, 0.0
+        return behind, round(time.time() - oldest, 3) if oldest else None
+
+    def stats(self):
+        """Per-replica queue depth and lag"""
+        replicas = []
+        for lane in self.lanes:
+            stats = lane.stats()
+            stats["lag_entries"], stats["lag_seconds"] = self.lag(lane)
+            replicas.append(stats)
+        return {
+            "session": self.session,
+            "head_seq": self.head,
+            "high_water": self.high_water,
+            "queue_depth": self.depth(),
+            "replicas": replicas,
+        }
+
+
+def to_replication_status(stats):
+    """ReplicationStatus for ReplicationQueue.stats(); unknown lag is sent as infinity"""
+    return ledger_pb2.ReplicationStatus(head_seq=stats["head_seq"], replicas=[
+        ledger_pb2.ReplicaLag(
+            target=r["target"],
+            acked_seq=r["acked_seq"] or 0,
+            lag_entries=r["lag_entries"],
+            lag_seconds=math.inf if r["lag_seconds"] is None else r["lag_seconds"],
+            reachable=r["reachable"]
+        )
+        for r in stats["replicas"]
+    ])
+
+
+# ----------- Consistency -----------
+def consistency_for(context, replicas):
+    """Resolve a write's consistency mode and the number of replica acks it needs"""
+    mode = dict(context.invocation_metadata()).get("x-consistency", CONSISTENCY)
+    if mode not in CONSISTENCY_MODES:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Unknown consistency mode: {mode}")
+    needed = {"eventual": 0, "quorum": min(WRITE_QUORUM, replicas), "all": replicas}[mode]
+    return mode, needed
+
+
+def wait_for_replicas(acks, needed, context):
+    """Wait for the first `needed` replica acks, all lanes in parallel.
+
+    Returns the number of replicas that acked before the deadline.
+    """
+    if needed == 0:
+        return 0
+    timeout = REPLICATION_TIMEOUT
+    if context.time_remaining() is not None:
+        timeout = min(timeout, context.time_remaining())
+    acked = 0
+    try:
+        for ack in futures.as_completed(acks, timeout=timeout):
+            if ack.exception() is None:
+                acked += 1
+                if acked >= needed:
+                    break
+    except futures.TimeoutError:
+        pass
+    return acked
+
+
+def confirm(mode, needed, acks, context, node):
+    """Build the response suffix for a write recorded at node, aborting if too few replicas acked"""
+    if mode == "eventual":
+        return "(Eventual Consistency)."
+    acked = wait_for_replicas(acks, needed, context)
+    if acked < needed:
+        context.abort(
+            grpc.StatusCode.DEADLINE_EXCEEDED,
+            f"Recorded at {node} but only {acked}/{needed} replicas acked within {REPLICATION_TIMEOUT}s"
+        )
+    return f"& replicated to {acked}/{len(acks)} replicas ({mode.capitalize()} Consistency)."
@@ -0,0 +1,124 @@
+"""
+Materialized "current status per batch" view.
+
+A batch_status collection holds one document per batch_id with the fields
+of its latest ledger entry (highest seq), fronted by an in-process LRU
+cache. Every write path folds the documents it inserted into the view, so
+a status lookup is one cache hit or one _id lookup instead of a replay of
+the ledger. Stores without a status table (the memory and log engines)
+keep every row in the in-process map instead, rebuilt from the ledger on
+startup. Updates are conditional on seq, so replaying entries or
+applying them out of order (replication, catch-up, repair) never moves a
+batch back to an older status.
+"""
+import threading
+from collections import OrderedDict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import ledger_pb2
+from storage import DUPLICATE_KEY
+
+CACHE_SIZE = 100_000  # batches kept in memory
+VIEW_FIELDS = ("sender", "receiver", "status", "seq")
+
+
+class StatusView:
+    """Latest entry per batch_id, kept in a collection plus an LRU cache"""
+
+    def __init__(self, store, cache_size=CACHE_SIZE):
+        self.store = store
+        self.view = store.status_table()  # batch_status collection keyed by batch_id, or None
+        self.cache_size = cache_size if self.view is not None else float("inf")
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        if self.view is not None:
+            self.view.create_index("seq", name="seq")
+        self._catch_up()
+
+    def _catch_up(self):
+        """Fold in ledger entries newer than anything in the view (e.g. after a crash)"""
+        newest = self.view.find_one({}, {"seq": 1}, sort=[("seq", -1)]) if self.view is not None else None
+        latest = {}
+        for doc in self.store.by_seq(newest["seq"]) if newest else self.store.scan():
+            current = latest.get(doc["batch_id"])
+            if current is None or doc.get("seq", 0) >= current.get("seq", 0):
+                latest[doc["batch_id"]] = doc  # later seq wins
+        if latest:
+            self.apply(latest.values())
+            print(f"📋 Status view updated for {len(latest)} batch(es)")
+
+    # ----------- Writes -----------
+    def apply(self, docs):
+        """Fold newly written ledger documents into the view"""
+        latest = {}
+        for doc in docs:
+            current = latest.get(doc["batch_id"])
+            if current is None or doc.get("seq", 0) > current.get("seq", 0):
+                latest[doc["batch_id"]] = doc
+        if not latest:
+            return
+
+        ops = []
+        for batch_id, doc in latest.items():
+            row = {f: doc.get(f, 0 if f == "seq" else "") for f in VIEW_FIELDS}
+            ops.append(UpdateOne({"_id": batch_id, "seq": {"$lt": row["seq"]}}, {"$set": row}, upsert=True))
+            self._remember(batch_id, row)
+        if self.view is None:
+            return
+        try:
+            self.view.bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # A duplicate _id means the stored row is already as new or newer
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+                raise
+
+    def recompute(self, batch_ids):
+        """Rebuild rows from the ledger, for when entries were deleted (anti-entropy repair)"""
+        for batch_id in set(batch_ids):
+            doc = self.store.latest(batch_id)
+            with self._lock:
+                self._cache.pop(batch_id, None)
+            row = None if doc is None else {f: doc.get(f, 0 if f == "seq" else "") for f in VIEW_FIELDS}
+            if self.view is None:
+                if row is not None:
+                    self._remember(batch_id, row)
+            elif row is None:
+                self.view.delete_one({"_id": batch_id})
+            else:
+                self.view.replace_one({"_id": batch_id}, row, upsert=True)
+
+    def _remember(self, batch_id, row):
+        with self._lock:
+            cached = self._cache.get(batch_id)
+            if cached is not None and cached["seq"] >= row["seq"]:
+                return
+            self._cache[batch_id] = row
+            self._cache.move_to_end(batch_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ----------- Reads -----------
+    def get_many(self, batch_ids):
+        """Map each batch_id to its current row, or None if the batch is unknown"""
+        rows, missing = {}, []
+        with self._lock:
+            for batch_id in batch_ids:
+                row = self._cache.get(batch_id)
+                if row is None:
+                    missing.append(batch_id)
+                else:
+                    self._cache.move_to_end(batch_id)
+                    rows[batch_id] = row
+        if missing and self.view is not None:
+            for doc in self.view.find({"_id": {"$in": missing}}):
+                batch_id = doc.pop("_id")
+                rows[batch_id] = doc
+                self._remember(batch_id, doc)
+        return {batch_id: rows.get(batch_id) for batch_id in batch_ids}
+
+
+def to_status(batch_id, row):
+    """View row → BatchStatus message (found=False for unknown batches)"""
+    if row is None:
+        return ledger_pb2.BatchStatus(batch_id=batch_id, found=False)
+    return ledger_pb2.BatchStatus(batch_id=batch_id, found=True, **{f: row[f] for f in VIEW_FIELDS})
@@ -0,0 +1,149 @@
+"""
+Sampled request tracing across the load balancer and the ledger nodes.
+
+The load balancer picks a trace id for a sampled /record and sends it as
+x-trace-id gRPC metadata; the factory copies it onto the replicated
+TransactionRequest (trace_id field), so the replicas see it too. Each
+process appends its spans as JSON lines to its own rotating file
+(traces/<node>.jsonl); writes go through a queue so the request path
+never touches the file. Unsampled requests carry no trace id and record
+nothing.
+
+Reconstruct the slowest traces from every node's files with:
+
+    python tracing.py slowest [--top N] [files ...]
+"""
+import argparse
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+TRACE_HEADER = "x-trace-id"
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0.01))  # fraction of /record calls traced
+TRACE_DIR = os.environ.get("TRACE_DIR", "traces")
+TRACE_MAX_BYTES = 5 * 1024 * 1024  # per file before rotating
+TRACE_BACKUPS = 3                  # rotated files kept per node
+
+
+def new_trace_id(forced=None, rate=TRACE_SAMPLE_RATE):
+    """A fresh trace id if this request is sampled (or forced), else None"""
+    if forced:
+        return forced
+    return uuid.uuid4().hex if random.random() < rate else None
+
+
+def trace_id_from(context):
+    """The x-trace-id sent with a gRPC call, or None"""
+    for key, value in context.invocation_metadata():
+        if key == TRACE_HEADER:
+            return value
+    return None
+
+
+def trace_metadata(trace_id):
+    return [(TRACE_HEADER, trace_id)] if trace_id else []
+
+
+class Tracer:
+    """Writes spans for one process to a rotating JSONL file, off the request path"""
+
+    def __init__(self, node, directory=TRACE_DIR):
+        self.node = node
+        os.makedirs(directory, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            os.path.join(directory, f"{node}.jsonl"), maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        records = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        self._log = logging.getLogger(f"trace.{node}")
+        self._log.propagate = False
+        self._log.setLevel(logging.INFO)
+        self._log.addHandler(logging.handlers.QueueHandler(records))
+
+    def record(self, trace_id, name, start, end, **attrs):
+        """Record one finished span; start/end are time.time() values"""
+        if not trace_id:
+            return
+        self._log.info(json.dumps({
+            "trace": trace_id,
+            "node": self.node,
+            "span": name,
+            "start": start,
+            "ms": round((end - start) * 1000, 3),
+            **({"attrs": attrs} if attrs else {}),
+        }))
+
+    @contextmanager
+    def span(self, trace_id, name, **attrs):
+        """Time a with-block as a span (a no-op for unsampled requests)"""
+        if not trace_id:
+            yield attrs
+            return
+        start = time.time()
+        try:
+            yield attrs  # callers may add attributes while the span is open
+        finally:
+            self.record(trace_id, name, start, time.time(), **attrs)
+
+
+# ---------------------- CLI ----------------------
+def load_spans(paths):
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except ValueError:
+                    continue  # partial line from a crash
+                traces[span["trace"]].append(span)
+    return traces
+
+
+def trace_bounds(spans):
+    start = min(s["start"] for s in spans)
+    end = max(s["start"] + s["ms"] / 1000 for s in spans)
+    return start, (end - start) * 1000
+
+
+def print_trace(trace_id, spans):
+    start, total = trace_bounds(spans)
+    print(f"trace {trace_id}  {total:.1f} ms  ({len(spans)} spans)")
+    for span in sorted(spans, key=lambda s: (s["start"], -s["ms"])):
+        offset = (span["start"] - start) * 1000
+        attrs = " ".join(f"{k}={v}" for k, v in span.get("attrs", {}).items())
+        print(f"  +{offset:8.1f} ms {span['ms']:9.1f} ms  {span['node']:<12} {span['span']:<24} {attrs}")
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect sampled ledger traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+    slowest = sub.add_parser("slowest", help="print the slowest traces, span by span")
+    slowest.add_argument("--top", type=int, default=5)
+    slowest.add_argument("files", nargs="*", help="trace files (default: */traces/*.jsonl* under the repo root)")
+    args = parser.parse_args(argv)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    paths = args.files or sorted(glob.glob(os.path.join(root, "*", TRACE_DIR, "*.jsonl*")))
+    if not paths:
+        sys.exit("No trace files found")
+    traces = load_spans(paths)
+    ranked = sorted(traces.items(), key=lambda item: trace_bounds(item[1])[1], reverse=True)
+    for trace_id, spans in ranked[:args.top]:
+        print_trace(trace_id, spans)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Asyncio gateway mode for the load balancer.
+
+Serves the same /record and /ledger contract as load_balancer.py, but on aiohttp with
+grpc.aio: one shared channel per backend, opened once at startup, and any
+number of forwards in flight on the event loop at the same time instead
+of one blocked Flask worker per request.
+
+Run it instead of load_balancer.py:  python async_gateway.py
+"""
+import asyncio
+import uuid
+import grpc
+from aiohttp import web
+import ledger_pb2
+import ledger_pb2_grpc
+from channel_pool import CHANNEL_OPTIONS
+from load_balancer import (
+    FORWARD_TIMEOUT, FORWARD_RETRIES, READ_TIMEOUT, NoReadableNode,
+    breakers, lag_view, primary_watcher, router, tracer, get_active_primary, is_retryable
+)
+from tracing import new_trace_id, trace_metadata
+from read_router import entry_to_json, parse_max_staleness
+from metrics import AioClientMetricsInterceptor, CONTENT_TYPE, render
+
+GATEWAY_PORT = 8080
+
+
+class AsyncChannelPool:
+    """One grpc.aio channel and stub per backend, created on the running loop"""
+
+    def __init__(self):
+        self._channels = {}
+        self._stubs = {}
+
+    def stub(self, target):
+        stub = self._stubs.get(target)
+        if stub is None:
+            channel = grpc.aio.insecure_channel(
+                target, options=CHANNEL_OPTIONS, interceptors=[AioClientMetricsInterceptor()]
+            )
+            self._channels[target] = channel
+            stub = self._stubs[target] = ledger_pb2_grpc.LedgerServiceStub(channel)
+        return stub
+
+    async def close(self):
+        await asyncio.gather(*(channel.close() for channel in self._channels.values()))
+        self._channels.clear()
+        self._stubs.clear()
+
+
+async def forward_record(pool, node, data, tx_id, trace=None, epoch=0):
+    """Forward a write to node, retrying transient failures with the same tx_id"""
+    message = ledger_pb2.TransactionRequest(
+        batch_id=data["batch_id"],
+        sender=data["sender"],
+        receiver=data["receiver"],
+        status=data["status"],
+        tx_id=tx_id,
+        epoch=epoch,
+    )
+    metadata = [("x-consistency", data["consistency"])] if "consistency" in data else []
+    metadata += trace_metadata(trace)
+    for attempt in range(FORWARD_RETRIES + 1):
+        try:
+            with tracer.span(trace, "forward", node=node, attempt=attempt):
+                response = await pool.stub(node).RecordTransaction(message, timeout=FORWARD_TIMEOUT, metadata=metadata)
+            breakers.record_success(node)
+            return response
+        except grpc.aio.AioRpcError as e:
+            if not is_retryable(e, idempotent=bool(tx_id)):
+                breakers.record_success(node)
+                raise
+            breakers.record_failure(node)
+            if attempt == FORWARD_RETRIES or not breakers.allow(node):
+                raise
+            print(f"🔁 Retrying {tx_id} on {node} after {e.code().name}")
+
+
+async def record_transaction(request):
+    trace = new_trace_id(request.headers.get("X-Trace-Id"))
+    with tracer.span(trace, "record"):
+        return await record(request, trace)
+
+
+async def record(request, trace):
+    data = await request.json()
+    node, epoch = primary_watcher.state
+
+    if not breakers.allow(node):
+        return web.json_response({
+            "error": f"Primary {node} is down. Please wait for failover.",
+            "node_used": node
+        }, status=503)
+
+    tx_id = data.get("tx_id") or uuid.uuid4().hex
+    try:
+        response = await forward_record(request.app["pool"], node, data, tx_id, trace, epoch)
+        body = {
+            "message": response.message,
+            "node_used": node,
+            "tx_id": tx_id,
+            "duplicate": response.duplicate
+        }
+        if trace:
+            body["trace_id"] = trace
+        return web.json_response(body)
+    except grpc.aio.AioRpcError as e:
+        if e.code() == grpc.StatusCode.FAILED_PRECONDITION:
+            return web.json_response({"error": e.details(), "node_used": node}, status=503)
+        return web.json_response({"error": str(e), "node_used": node}, status=500)
+    except Exception as e:
+        return web.json_response({"error": str(e), "node_used": node}, status=500)
+
+
+async def route_read(pool, call, max_staleness=None):
+    """Async version of load_balancer.route_read"""
+    primary = get_active_primary()
+    tried = []
+    for _ in router.nodes:
+        node = router.pick(primary, exclude=tried, max_staleness=max_staleness)
+        if node is None:
+            break
+        tried.append(node)
+        try:
+            with router.track(node):
+                result = await call(pool.stub(node))
+            breakers.record_success(node)
+            return node, result
+        except grpc.aio.AioRpcError as e:
+            if not is_retryable(e):
+                breakers.record_success(node)
+                raise
+            breakers.record_failure(node)
+            print(f"🔁 Read failed on {node} ({e.code().name}), trying another node")
+    raise NoReadableNode(f"No healthy node to read from (tried {tried or 'none'})")
+
+
+async def read_response(request, batch_id=None):
+    try:
+        max_staleness = parse_max_staleness(request.query.get("max_staleness"))
+    except ValueError as e:
+        return web.json_response({"error": f"Invalid max_staleness: {e}"}, status=400)
+    try:
+        if batch_id is None:
+            call = lambda stub: stub.GetLedger(ledger_pb2.Empty(), timeout=READ_TIMEOUT)
+        else:
+            query = ledger_pb2.BatchQuery(batch_id=batch_id)
+            call = lambda stub: stub.GetBatchHistory(query, timeout=READ_TIMEOUT)
+        node, ledger = await route_read(request.app["pool"], call, max_staleness)
+        entries = [entry_to_json(e) for e in ledger.entries]
+        return web.json_response({"entries": entries, "count": len(entries), "node_used": node})
+    except NoReadableNode as e:
+        return web.json_response({"error": str(e)}, status=503)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+
+async def get_ledger(request):
+    return await read_response(request)
+
+
+async def get_batch(request):
+    return await read_response(request, request.match_info["batch_id"])
+
+
+async def replication_lag(request):
+    return web.json_response(lag_view.snapshot())
+
+
+async def metrics(request):
+    return web.Response(body=render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def home(request):
+    return web.Response(
+        text=f"Load Balancer (async gateway) is running 🚀<br>Current Primary: {get_active_primary()}",
+        content_type="text/html"
+    )
+
+
+async def on_startup(app):
+    app["pool"] = AsyncChannelPool()
+
+
+async def on_cleanup(app):
+    await app["pool"].close()
+
+
+def make_app():
+    app = web.Application()
+    app.router.add_post("/record", record_transaction)
+    app.router.add_get("/ledger", get_ledger)
+    app.router.add_get("/ledger/{batch_id}", get_batch)
+    app.router.add_get("/replication", replication_lag)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/", home)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(make_app(), port=GATEWAY_PORT)
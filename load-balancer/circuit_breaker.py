@@ -0,0 +1,136 @@
+"""
+Passive health tracking for load-balancer backends.
+
+Each backend has a circuit breaker fed by the outcome of the real gRPC
+calls forwarded to it:
+
+  closed     requests flow; FAILURE_THRESHOLD consecutive transport
+             failures open the breaker
+  open       requests are refused at once; after OPEN_COOLDOWN seconds a
+             background probe checks the node, and a passing probe moves
+             it to half-open
+  half-open  requests flow again; the first success closes the breaker,
+             the first failure re-opens it
+
+The request path only reads the state under a lock. Probes run on a small
+fixed pool (MAX_PROBES), at most one per backend at a time, so a dead
+cluster never costs more than a few outstanding health checks.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+FAILURE_THRESHOLD = 3  # consecutive failures before a breaker opens
+OPEN_COOLDOWN = 5      # seconds an open breaker waits before probing
+PROBE_INTERVAL = 1     # seconds between prober sweeps
+MAX_PROBES = 2         # health probes in flight at once, across all backends
+
+
+class CircuitBreaker:
+    """Breaker state for one backend"""
+
+    def __init__(self, node, threshold=FAILURE_THRESHOLD, cooldown=OPEN_COOLDOWN):
+        self.node = node
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may be sent to this backend right now"""
+        return self.state != OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                print(f"✅ Circuit for {self.node} closed")
+            self.state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        print(f"⛔ Circuit for {self.node} opened after {self.failures} failure(s)")
+
+    def claim_probe(self):
+        """Reserve the single probe slot if the breaker is open and cooled down"""
+        with self._lock:
+            if self.state != OPEN or self.probing:
+                return False
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.probing = True
+            return True
+
+    def finish_probe(self, healthy):
+        with self._lock:
+            self.probing = False
+            if self.state != OPEN:
+                return
+            if healthy:
+                self.state = HALF_OPEN
+                print(f"🟡 Circuit for {self.node} half-open")
+            else:
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        return {"state": self.state, "failures": self.failures}
+
+
+class BreakerBoard:
+    """Circuit breakers for a fixed set of backends, plus the background prober.
+
+    probe(node) -> bool is a blocking health check; it only runs for open
+    breakers whose cooldown has expired.
+    """
+
+    def __init__(self, nodes, probe, max_probes=MAX_PROBES, interval=PROBE_INTERVAL):
+        self.breakers = {node: CircuitBreaker(node) for node in nodes}
+        self._probe = probe
+        self._interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=max_probes, thread_name_prefix="probe")
+        threading.Thread(target=self._run, name="breaker-prober", daemon=True).start()
+
+    def allow(self, node):
+        breaker = self.breakers.get(node)
+        return breaker is not None and breaker.allow()
+
+    def record_success(self, node):
+        if node in self.breakers:
+            self.breakers[node].record_success()
+
+    def record_failure(self, node):
+        if node in self.breakers:
+            self.breakers[node].record_failure()
+
+    def state(self, node):
+        breaker = self.breakers.get(node)
+        return breaker.state if breaker else OPEN
+
+    def snapshot(self):
+        return {node: b.snapshot() for node, b in self.breakers.items()}
+
+    def _check(self, breaker):
+        try:
+            healthy = bool(self._probe(breaker.node))
+        except Exception:
+            healthy = False
+        breaker.finish_probe(healthy)
+
+    def _run(self):
+        while True:
+            time.sleep(self._interval)
+            for breaker in self.breakers.values():
+                if breaker.claim_probe():
+                    self._executor.submit(self._check, breaker)
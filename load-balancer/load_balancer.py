@@ -44,53 +44,115 @@ if __name__ == "__main__":
 """
 import grpc
 import ledger_pb2
-import ledger_pb2_grpc
-from flask import Flask, request, jsonify
-import os
-import requests
+from channel_pool import ChannelPool
+from primary_watcher import PrimaryWatcher
+from circuit_breaker import BreakerBoard
+from read_router import LagView, ReadRouter, entry_to_json, parse_max_staleness
+from flask import Flask, Response, request, jsonify
+from metrics import CONTENT_TYPE, render
+from grpc_health.v1 import health_pb2
+from tracing import Tracer, new_trace_id, trace_metadata
 import threading
 import time
+import uuid
 
-# Health ports corresponding to gRPC ports
-HEALTH_PORTS = {
-    "localhost:50051": 8001,  # Factory
-    "localhost:50052": 8002,  # Distributor
-    "localhost:50053": 8003   # Pharmacy
-}
+# Ledger nodes (gRPC targets); each also serves grpc.health.v1 on the same port
+NODES = [
+    "localhost:50051",  # Factory
+    "localhost:50052",  # Distributor
+    "localhost:50053"   # Pharmacy
+]
+HEALTH_SERVICE = "LedgerService"
+HEALTH_TIMEOUT = 2    # seconds per health check
 
-# Path to file where monitor writes the active primary
-PRIMARY_FILE = "active_primary.txt"
+FORWARD_TIMEOUT = 5   # seconds per forwarded RecordTransaction attempt
+FORWARD_RETRIES = 2   # extra attempts; safe because every forward carries a tx_id
+READ_TIMEOUT = 5      # seconds per ledger read
+LAG_TIMEOUT = 1       # seconds per GetReplicationStatus poll
 
 # Flask app
 app = Flask(__name__)
 
+# One long-lived channel per backend, reused across requests
+pool = ChannelPool()
+
+# Sampled request traces, written to traces/load-balancer.jsonl
+tracer = Tracer("load-balancer")
+
+# Active primary kept in memory, pushed by the nodes over a WatchPrimary stream
+primary_watcher = PrimaryWatcher(NODES, pool, default="localhost:50051")
+
 def get_active_primary():
-    """Read the currently active primary from the file"""
-    if os.path.exists(PRIMARY_FILE):
-        with open(PRIMARY_FILE, "r") as f:
-            port = f.read().strip()
-            return f"localhost:{port}"
-    # Default primary if file missing
-    return "localhost:50051"
+    """Return the currently active primary (no file I/O on the request path)"""
+    return primary_watcher.current
 
 def is_alive(node):
-    """Check node health by pinging its /health endpoint"""
-    health_port = HEALTH_PORTS.get(node)
-    if not health_port:
-        return False
+    """Ask the node's gRPC health service whether it is SERVING (used by the breaker prober only)"""
     try:
-        res = requests.get(f"http://{node.split(':')[0]}:{health_port}/health", timeout=2)
-        return res.status_code == 200
-    except Exception:
+        response = pool.health_stub(node).Check(
+            health_pb2.HealthCheckRequest(service=HEALTH_SERVICE), timeout=HEALTH_TIMEOUT
+        )
+    except grpc.RpcError:
         return False
+    return response.status == health_pb2.HealthCheckResponse.SERVING
+
+RETRYABLE_CODES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+def is_retryable(error, idempotent=True):
+    """True if a failed call may be sent again, judged by its status code.
+
+    Both codes leave it unknown whether the node applied the call, so only
+    idempotent calls are retried: reads, and writes that carry a tx_id (a
+    repeat is answered as a duplicate rather than recorded twice).
+    """
+    return idempotent and error.code() in RETRYABLE_CODES
+
+# Passive health: breakers fed by forwarded calls, probed in the background only when open
+breakers = BreakerBoard(NODES, probe=is_alive)
+
+def forward_record(node, data, tx_id, trace=None, epoch=0):
+    """Forward a write to node, retrying transient failures with the same tx_id"""
+    message = ledger_pb2.TransactionRequest(
+        batch_id=data["batch_id"],
+        sender=data["sender"],
+        receiver=data["receiver"],
+        status=data["status"],
+        tx_id=tx_id,
+        epoch=epoch,  # the node rejects the write if it no longer holds this lease epoch
+    )
+    # Optional per-request consistency: eventual | quorum | all
+    metadata = [("x-consistency", data["consistency"])] if "consistency" in data else []
+    metadata += trace_metadata(trace)
+    for attempt in range(FORWARD_RETRIES + 1):
+        try:
+            with tracer.span(trace, "forward", node=node, attempt=attempt):
+                response = pool.stub(node).RecordTransaction(message, timeout=FORWARD_TIMEOUT, metadata=metadata)
+            breakers.record_success(node)
+            return response
+        except grpc.RpcError as e:
+            if not is_retryable(e, idempotent=bool(tx_id)):
+                # The node answered, so it is up even though the call failed
+                breakers.record_success(node)
+                raise
+            breakers.record_failure(node)
+            if attempt == FORWARD_RETRIES or not breakers.allow(node):
+                raise
+            print(f"🔁 Retrying {tx_id} on {node} after {e.code().name}")
 
 @app.route("/record", methods=["POST"])
 def record_transaction():
-    data = request.json
-    node = get_active_primary()
+    # Sampled requests (or ones sent with an X-Trace-Id header) are traced end to end
+    trace = new_trace_id(request.headers.get("X-Trace-Id"))
+    with tracer.span(trace, "record"):
+        return record(request.json, trace)
+
+def record(data, trace):
+    node, epoch = primary_watcher.state
 
-    # Validate node health before routing
-    if not is_alive(node):
+    # Refuse immediately while the primary's circuit is open
+    with tracer.span(trace, "health_check", node=node) as span:
+        span["allowed"] = breakers.allow(node)
+    if not span["allowed"]:
         return jsonify({
             "error": f"Primary {node} is down. Please wait for failover.",
             "node_used": node
@@ -98,21 +160,101 @@ def record_transaction():
 
     print(f"📦 Routing request to active primary: {node}")
 
+    # Clients may send their own tx_id; otherwise one is generated here so
+    # retries below can't record the transaction twice.
+    tx_id = data.get("tx_id") or uuid.uuid4().hex
     try:
-        with grpc.insecure_channel(node) as channel:
-            stub = ledger_pb2_grpc.LedgerServiceStub(channel)
-            response = stub.RecordTransaction(
-                ledger_pb2.TransactionRequest(
-                    batch_id=data["batch_id"],
-                    sender=data["sender"],
-                    receiver=data["receiver"],
-                    status=data["status"],
-                )
-            )
-        return jsonify({"message": response.message, "node_used": node})
+        response = forward_record(node, data, tx_id, trace, epoch)
+        body = {
+            "message": response.message,
+            "node_used": node,
+            "tx_id": tx_id,
+            "duplicate": response.duplicate
+        }
+        if trace:
+            body["trace_id"] = trace
+        return jsonify(body)
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.FAILED_PRECONDITION:
+            # Lost the lease (failover in progress); the client can retry shortly
+            return jsonify({"error": e.details(), "node_used": node}), 503
+        return jsonify({"error": str(e), "node_used": node}), 500
     except Exception as e:
         return jsonify({"error": str(e), "node_used": node}), 500
 
+# ---------------------- Reads ----------------------
+# Ledger reads are spread over healthy replicas; the primary only serves them as a fallback
+def fetch_replication_status(node):
+    return pool.stub(node).GetReplicationStatus(ledger_pb2.Empty(), timeout=LAG_TIMEOUT)
+
+lag_view = LagView(fetch_replication_status, get_active_primary)
+router = ReadRouter(NODES, breakers, lag_view)
+
+class NoReadableNode(Exception):
+    pass
+
+def route_read(call, max_staleness=None):
+    """Run call(stub) on the best read node, moving on to the next one (each tried once) on transport errors"""
+    primary = get_active_primary()
+    tried = []
+    for _ in router.nodes:
+        node = router.pick(primary, exclude=tried, max_staleness=max_staleness)
+        if node is None:
+            break
+        tried.append(node)
+        try:
+            with router.track(node):
+                result = call(pool.stub(node))
+            breakers.record_success(node)
+            return node, result
+        except grpc.RpcError as e:
+            if not is_retryable(e):
+                breakers.record_success(node)
+                raise
+            breakers.record_failure(node)
+            print(f"🔁 Read failed on {node} ({e.code().name}), trying another node")
+    raise NoReadableNode(f"No healthy node to read from (tried {tried or 'none'})")
+
+def read_entries(batch_id=None, max_staleness=None):
+    if batch_id is None:
+        call = lambda stub: stub.GetLedger(ledger_pb2.Empty(), timeout=READ_TIMEOUT)
+    else:
+        query = ledger_pb2.BatchQuery(batch_id=batch_id)
+        call = lambda stub: stub.GetBatchHistory(query, timeout=READ_TIMEOUT)
+    node, ledger = route_read(call, max_staleness)
+    return node, [entry_to_json(e) for e in ledger.entries]
+
+def read_response(batch_id=None):
+    try:
+        max_staleness = parse_max_staleness(request.args.get("max_staleness"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid max_staleness: {e}"}), 400
+    try:
+        node, entries = read_entries(batch_id, max_staleness)
+        return jsonify({"entries": entries, "count": len(entries), "node_used": node})
+    except NoReadableNode as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/ledger", methods=["GET"])
+def get_ledger():
+    return read_response()
+
+@app.route("/ledger/<batch_id>", methods=["GET"])
+def get_batch(batch_id):
+    return read_response(batch_id)
+
+@app.route("/replication")
+def replication_lag():
+    """Per-replica lag as last reported by the primary"""
+    return jsonify(lag_view.snapshot())
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus metrics for the forwarded gRPC calls"""
+    return Response(render(), content_type=CONTENT_TYPE)
+
 @app.route("/")
 def home():
     primary = get_active_primary()
@@ -123,8 +265,8 @@ def background_health_check():
     """Periodically logs which node is active and healthy"""
     while True:
         primary = get_active_primary()
-        status = "✅" if is_alive(primary) else "❌"
-        print(f"[Monitor] Primary: {primary} {status}")
+        status = "✅" if breakers.allow(primary) else "❌"
+        print(f"[Monitor] Primary: {primary} {status} (circuit {breakers.state(primary)})")
         time.sleep(5)
 
 if __name__ == "__main__":
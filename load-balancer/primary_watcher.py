@@ -0,0 +1,63 @@
+"""
+In-memory view of the active primary.
+
+The nodes elect the primary among themselves with a fenced lease (see
+lease.py on the nodes). The load balancer keeps a WatchPrimary stream open
+to one node, which sends the lease holder and epoch straight away and
+again whenever either changes, so the request path just reads an
+attribute. If that node goes away the watcher moves on to the next one.
+Writes are forwarded with the epoch, so a node that has lost the lease
+meanwhile rejects them instead of accepting a stale write.
+"""
+import threading
+import time
+import grpc
+import ledger_pb2
+
+RECONNECT_DELAY = 0.2  # seconds before watching the next node after a stream breaks
+
+
+class PrimaryWatcher:
+    """Tracks the primary lease holder and epoch through WatchPrimary streams"""
+
+    def __init__(self, nodes, pool, default="localhost:50051"):
+        self.nodes = list(nodes)
+        self.pool = pool
+        self.state = (default, 0)  # (holder, epoch), replaced as a whole
+        self._listeners = []
+        threading.Thread(target=self._run, name="primary-watcher", daemon=True).start()
+
+    @property
+    def current(self):
+        return self.state[0]
+
+    @property
+    def epoch(self):
+        return self.state[1]
+
+    def on_change(self, callback):
+        """Register callback(old, new), called when the primary changes"""
+        self._listeners.append(callback)
+
+    def _set(self, primary, epoch):
+        old = self.current
+        self.state = (primary, epoch)
+        if old != primary:
+            print(f"🔁 Primary changed: {old} → {primary} (epoch {epoch})")
+            for callback in self._listeners:
+                callback(old, primary)
+
+    def _run(self):
+        i = 0
+        while True:
+            node = self.nodes[i % len(self.nodes)]
+            watching = False
+            try:
+                for info in self.pool.stub(node).WatchPrimary(ledger_pb2.Empty()):
+                    watching = True
+                    self._set(info.holder, info.epoch)
+            except grpc.RpcError as e:
+                if watching:
+                    print(f"⚠️ Lost primary watch on {node} ({e.code().name}), trying the next node")
+            i += 1
+            time.sleep(RECONNECT_DELAY)
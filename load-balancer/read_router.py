@@ -0,0 +1,158 @@
+"""
+Read routing for ledger queries.
+
+Reads go to the replicas rather than the primary. Among the replicas whose
+circuit is not open, the router picks the one with the fewest requests in
+flight from this balancer, breaking ties by an EWMA of its recent read
+latency, so a slow replica naturally receives less traffic. When no
+replica is usable the primary serves the read.
+
+A read may carry a maximum staleness in seconds. LagView polls the primary's
+GetReplicationStatus for each replica's lag; a replica only serves a bounded
+read if its lag at the last poll plus the time since that poll is within
+the bound. Replicas with no recent lag report, or whose lag the primary
+doesn't know yet, are treated as too stale.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+EWMA_DECAY = 0.3          # weight of the newest latency sample
+LAG_POLL_INTERVAL = 0.5   # seconds between GetReplicationStatus polls
+LAG_MAX_AGE = 5           # lag reports older than this are ignored
+
+
+class LagView:
+    """Per-replica lag as last reported by the primary, refreshed by a poller thread"""
+
+    def __init__(self, fetch, get_primary, interval=LAG_POLL_INTERVAL):
+        self.fetch = fetch              # fetch(primary) -> ReplicationStatus
+        self.get_primary = get_primary
+        self.interval = interval
+        self.reports = {}               # target -> (lag_seconds, lag_entries, fetched_at)
+        self._lock = threading.Lock()
+        threading.Thread(target=self._poll, name="lag-view", daemon=True).start()
+
+    def _poll(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Could not fetch replication lag: {e}")
+            time.sleep(self.interval)
+
+    def refresh(self):
+        primary = self.get_primary()
+        status = self.fetch(primary)
+        now = time.monotonic()
+        reports = {
+            r.target: (r.lag_seconds, r.lag_entries, now)
+            for r in status.replicas if r.reachable
+        }
+        with self._lock:
+            self.reports = reports
+
+    def staleness(self, node):
+        """Upper bound on how many seconds of writes node may be missing (inf if unknown)"""
+        with self._lock:
+            report = self.reports.get(node)
+        if report is None:
+            return math.inf
+        lag_seconds, _, fetched_at = report
+        age = time.monotonic() - fetched_at
+        return math.inf if age > LAG_MAX_AGE else lag_seconds + age
+
+    def snapshot(self):
+        with self._lock:
+            reports = dict(self.reports)
+        now = time.monotonic()
+        return {
+            node: {
+                "lag_seconds": lag_seconds if math.isfinite(lag_seconds) else None,  # None: not known yet
+                "lag_entries": lag_entries,
+                "report_age": round(now - at, 3),
+            }
+            for node, (lag_seconds, lag_entries, at) in reports.items()
+        }
+
+
+def parse_max_staleness(value):
+    """?max_staleness=<seconds> → float, or None when absent"""
+    if value is None or value == "":
+        return None
+    bound = float(value)
+    if not bound >= 0:  # also rejects nan
+        raise ValueError("max_staleness must be a non-negative number of seconds")
+    return bound
+
+
+class ReadRouter:
+    """Least-outstanding-requests picker with EWMA latency tie-break"""
+
+    def __init__(self, nodes, breakers, lag=None):
+        self.nodes = list(nodes)
+        self.breakers = breakers
+        self.lag = lag  # LagView, needed for bounded-staleness reads
+        self.outstanding = {node: 0 for node in self.nodes}
+        self.latency = {node: 0.0 for node in self.nodes}
+        self._lock = threading.Lock()
+
+    def fresh_enough(self, node, max_staleness):
+        if max_staleness is None:
+            return True
+        return self.lag is not None and self.lag.staleness(node) <= max_staleness
+
+    def pick(self, primary, exclude=(), max_staleness=None):
+        """Choose a node for the next read, or None if nothing is usable.
+
+        With max_staleness (seconds), only replicas known to be within the
+        bound qualify; otherwise the read goes to the primary.
+        """
+        replicas = [
+            n for n in self.nodes
+            if n != primary and n not in exclude and self.breakers.allow(n)
+            and self.fresh_enough(n, max_staleness)
+        ]
+        if not replicas:
+            # Fall back to the primary
+            if primary in exclude or not self.breakers.allow(primary):
+                return None
+            return primary
+        with self._lock:
+            return min(replicas, key=lambda n: (self.outstanding[n], self.latency[n]))
+
+    @contextmanager
+    def track(self, node):
+        """Count a read as outstanding on node and fold its latency into the EWMA"""
+        with self._lock:
+            self.outstanding[node] = self.outstanding.get(node, 0) + 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.outstanding[node] -= 1
+                previous = self.latency.get(node, 0.0)
+                self.latency[node] = elapsed if not previous else (
+                    EWMA_DECAY * elapsed + (1 - EWMA_DECAY) * previous
+                )
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                node: {"outstanding": self.outstanding[node], "latency_ms": round(self.latency[node] * 1000, 2)}
+                for node in self.nodes
+            }
+
+
+def entry_to_json(entry):
+    """LedgerEntry → JSON-friendly dict"""
+    return {
+        "batch_id": entry.batch_id,
+        "sender": entry.sender,
+        "receiver": entry.receiver,
+        "status": entry.status,
+        "seq": entry.seq
+    }
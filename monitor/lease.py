@@ -0,0 +1,32 @@
+"""
+Read-only view of the primary lease for the monitor.
+
+The nodes elect the primary themselves (see lease.py in factory/,
+distributor/ and pharmacy/); the lease file they share holds the current
+holder, its epoch and a wall-clock expiry. The monitor only reports it.
+"""
+import json
+import os
+from collections import namedtuple
+import ledger_pb2
+
+LEASE_FILE = os.environ.get(
+    "LEDGER_LEASE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "primary.lease")
+)
+
+Lease = namedtuple("Lease", ["holder", "epoch", "expires"])
+
+
+def read_lease(path=LEASE_FILE):
+    """The current lease, or None if nobody has taken one yet"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return Lease(data["holder"], data["epoch"], data["expires"])
+
+
+def to_primary_info(lease):
+    return ledger_pb2.PrimaryInfo(holder=lease.holder, epoch=lease.epoch, expires=lease.expires)
@@ -1,59 +1,117 @@
+import asyncio
+import math
 import time
-import requests
+from collections import deque
+import grpc
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+from lease import read_lease
 
 # Primary–Backup configuration
 NODES = [
-    {"name": "Factory", "grpc_port": 50051, "health_port": 8001},
-    {"name": "Distributor", "grpc_port": 50052, "health_port": 8002},
-    {"name": "Pharmacy", "grpc_port": 50053, "health_port": 8003},
+    {"name": "Factory", "grpc_port": 50051},
+    {"name": "Distributor", "grpc_port": 50052},
+    {"name": "Pharmacy", "grpc_port": 50053},
 ]
 
-PRIMARY_FILE = "active_primary.txt"
-HEARTBEAT_INTERVAL = 3  # seconds
-FAIL_THRESHOLD = 3      # consecutive failures before failover
+PROBE_INTERVAL = 0.25   # seconds between probes of every node
+PROBE_TIMEOUT = 0.5     # seconds before a probe counts as missed
+PHI_THRESHOLD = 8       # suspicion level at which a node is considered down
+PHI_WINDOW = 100        # heartbeat intervals kept per node
+PHI_MIN_STD = 0.1       # floor on the interval std-dev, so a steady node isn't suspected on one late reply
+HEALTH_SERVICE = "LedgerService"
+
+CHANNEL_OPTIONS = [
+    ("grpc.initial_reconnect_backoff_ms", 200),
+    ("grpc.min_reconnect_backoff_ms", 200),
+    ("grpc.max_reconnect_backoff_ms", 1000),
+]
+
+
+# ---------------------- Failure detection ----------------------
+class PhiAccrualDetector:
+    """Phi-accrual failure detector (Hayashibara et al.).
+
+    Instead of a fixed miss count, phi measures how unlikely it is that the
+    next heartbeat is still on its way given the intervals seen so far:
+    phi = -log10(P(interval > time since last heartbeat)). A steady node is
+    suspected within a few missed probes; a jittery one gets more slack.
+    """
+
+    def __init__(self, expected_interval=PROBE_INTERVAL):
+        self.intervals = deque([expected_interval], maxlen=PHI_WINDOW)
+        self.last = time.monotonic()  # a node never heard from is measured from startup
+
+    def heartbeat(self):
+        now = time.monotonic()
+        self.intervals.append(now - self.last)
+        self.last = now
+
+    def phi(self):
+        elapsed = time.monotonic() - self.last
+        mean = sum(self.intervals) / len(self.intervals)
+        variance = sum((i - mean) ** 2 for i in self.intervals) / len(self.intervals)
+        std = max(math.sqrt(variance), PHI_MIN_STD)
+        p_later = 0.5 * math.erfc((elapsed - mean) / (std * math.sqrt(2)))
+        return -math.log10(p_later) if p_later > 0 else math.inf
+
+
+class NodeState:
+    """What the monitor knows about one node"""
+
+    def __init__(self, node):
+        self.node = node
+        self.target = f"localhost:{node['grpc_port']}"
+        self.detector = PhiAccrualDetector()
+        self.status = "UNKNOWN"  # last grpc.health.v1 status the node reported
+        self.suspected = False
+
+    def healthy(self):
+        return self.detector.phi() < PHI_THRESHOLD
+
+
+async def probe(state, stub):
+    """Check a node's gRPC health service; a SERVING reply is a heartbeat"""
+    try:
+        response = await stub.Check(health_pb2.HealthCheckRequest(service=HEALTH_SERVICE), timeout=PROBE_TIMEOUT)
+    except grpc.aio.AioRpcError:
+        return
+    state.status = health_pb2.HealthCheckResponse.ServingStatus.Name(response.status)
+    if response.status == health_pb2.HealthCheckResponse.SERVING:
+        state.detector.heartbeat()
+
+
+# ---------------------- Monitor loop ----------------------
+# Failover itself is done by the nodes through the primary lease (lease.py);
+# the monitor only reports node health and who holds the lease.
+async def monitor_nodes():
+    states = [NodeState(node) for node in NODES]
+    channels = [grpc.aio.insecure_channel(s.target, options=CHANNEL_OPTIONS) for s in states]
+    stubs = [health_pb2_grpc.HealthStub(channel) for channel in channels]
+    seen = None  # (holder, epoch) last reported
+
+    print("🚀 Monitoring started.")
 
-def is_alive(health_port):
-    """Check if node's health endpoint responds"""
     try:
-        res = requests.get(f"http://localhost:{health_port}/health", timeout=2)
-        return res.status_code == 200
-    except Exception:
-        return False
-
-def write_primary(port):
-    """Write current primary gRPC port to file"""
-    with open(PRIMARY_FILE, "w") as f:
-        f.write(str(port))
-    print(f"🔁 Active primary updated → {port}")
-
-def monitor_nodes():
-    current_primary_index = 0
-    fail_count = 0
-
-    print(f"🚀 Monitoring started. Primary: {NODES[current_primary_index]['name']} ({NODES[current_primary_index]['grpc_port']})")
-    write_primary(NODES[current_primary_index]["grpc_port"])
-
-    while True:
-        primary = NODES[current_primary_index]
-        alive = is_alive(primary["health_port"])
-
-        if alive:
-            print(f"✅ {primary['name']} healthy")
-            fail_count = 0
-        else:
-            fail_count += 1
-            print(f"❌ Heartbeat failed ({fail_count}/{FAIL_THRESHOLD}) for {primary['name']}")
-            if fail_count >= FAIL_THRESHOLD:
-                # Promote next available backup
-                next_index = (current_primary_index + 1) % len(NODES)
-                new_primary = NODES[next_index]
-                print(f"⚠️ Promoting {new_primary['name']} as new Primary")
-                write_primary(new_primary["grpc_port"])
-                current_primary_index = next_index
-                fail_count = 0
-                time.sleep(3)  # small delay for system to stabilize
-
-        time.sleep(HEARTBEAT_INTERVAL)
+        while True:
+            started = time.monotonic()
+            await asyncio.gather(*(probe(s, stub) for s, stub in zip(states, stubs)))
+
+            for s in states:
+                healthy = s.healthy()
+                if healthy and s.suspected:
+                    print(f"✅ {s.node['name']} healthy again")
+                elif not healthy and not s.suspected:
+                    print(f"❌ {s.node['name']} suspected down (phi {s.detector.phi():.1f}, last status {s.status})")
+                s.suspected = not healthy
+
+            lease = read_lease()
+            if lease and (lease.holder, lease.epoch) != seen:
+                seen = (lease.holder, lease.epoch)
+                print(f"👑 Primary: {lease.holder} (epoch {lease.epoch})")
+
+            await asyncio.sleep(max(0, PROBE_INTERVAL - (time.monotonic() - started)))
+    finally:
+        await asyncio.gather(*(channel.close() for channel in channels))
 
 if __name__ == "__main__":
-    monitor_nodes()
+    asyncio.run(monitor_nodes())
@@ -0,0 +1,70 @@
+"""
+Group commit for single-document ledger writes.
+
+Concurrent RecordTransaction handlers hand their document to one writer
+thread instead of each doing its own single-document insert. The writer
+takes everything queued (up to GROUP_MAX_DOCS documents) without waiting
+for more, writes it with a single unordered store insert and then wakes
+every waiting handler with its own outcome (a duplicate tx_id still
+surfaces as DuplicateEntry to its caller). Handlers that arrive while a
+group is being written make up the next one, so a lone writer is flushed
+at once and groups grow with load. Every handler blocks until its group
+is written, so a group holds at most as many documents as the server has
+handler threads.
+
+Durability is a per-node setting (LEDGER_DURABILITY, see storage.py): "w1"
+acknowledges once the store has applied the write, "journaled" also waits
+for the journal flush (Mongo) or fsync (log engine). Group commit
+amortises that flush across the group.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from metrics import MONGO_WRITE_SECONDS, MONGO_WRITE_DOCS
+
+GROUP_MAX_DOCS = int(os.environ.get("LEDGER_GROUP_MAX_DOCS", 256))  # documents per store insert
+
+
+class GroupCommitter:
+    """Batches concurrent single-document inserts into shared store inserts"""
+
+    def __init__(self, store, max_docs=GROUP_MAX_DOCS):
+        self.store = store
+        self.max_docs = max_docs
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="group-commit", daemon=True).start()
+
+    def insert(self, doc):
+        """Insert one document as part of the next group; blocks until it is written"""
+        future = Future()
+        self._queue.put((doc, future))
+        return future.result()
+
+    def _collect(self):
+        """Block for the first document, then take whatever else is already queued"""
+        group = [self._queue.get()]
+        while len(group) < self.max_docs:
+            try:
+                group.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _flush(self, group):
+        MONGO_WRITE_DOCS.observe("group_commit", value=len(group))
+        try:
+            with MONGO_WRITE_SECONDS.time("group_commit"):
+                errors = self.store.insert([doc for doc, _ in group], ordered=False)
+        except Exception as e:
+            errors = {i: e for i in range(len(group))}
+
+        for i, (_, future) in enumerate(group):
+            if i in errors:
+                future.set_exception(errors[i])
+            else:
+                future.set_result(None)
+
+    def _run(self):
+        while True:
+            self._flush(self._collect())
@@ -0,0 +1,68 @@
+"""
+Standard grpc.health.v1 service for a ledger node.
+
+The health service runs on the node's own gRPC port, so the load balancer
+and the monitor check it over the channels they already hold instead of a
+separate HTTP server. A background thread re-evaluates the node every
+HEALTH_INTERVAL: the ledger store must answer a ping (Mongo's on a
+dedicated client with short timeouts, so an outage is noticed in about a
+second), and on the primary the replication queue must not be over its
+high-water mark, where writes start blocking. Both the overall service ("") and
+LedgerService report SERVING or NOT_SERVING; Watch streams see every
+transition.
+"""
+import threading
+import time
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+
+HEALTH_INTERVAL = 1        # seconds between checks
+SERVICES = ("", "LedgerService")
+
+SERVING = health_pb2.HealthCheckResponse.SERVING
+NOT_SERVING = health_pb2.HealthCheckResponse.NOT_SERVING
+
+
+class NodeHealth:
+    """Keeps a HealthServicer in line with storage and replication state"""
+
+    def __init__(self, store, replication=None, interval=HEALTH_INTERVAL):
+        self.servicer = health.HealthServicer()
+        self.store = store
+        self.replication = replication
+        self.interval = interval
+        self.problems = []
+        self.status = None  # unknown until the first check
+        self.update()
+        threading.Thread(target=self._run, name="health", daemon=True).start()
+
+    def add_to_server(self, server):
+        health_pb2_grpc.add_HealthServicer_to_server(self.servicer, server)
+
+    def check(self):
+        """Reasons this node can't serve right now (empty if healthy)"""
+        problems = []
+        try:
+            self.store.ping()
+        except Exception as e:
+            problems.append(f"{self.store.name} storage unavailable: {e}")
+        if self.replication is not None and self.replication.saturated():
+            problems.append("replication queue over its high-water mark")
+        return problems
+
+    def update(self):
+        self.problems = self.check()
+        status = NOT_SERVING if self.problems else SERVING
+        if status == self.status:
+            return
+        if self.problems:
+            print(f"🩺 NOT_SERVING: {'; '.join(self.problems)}")
+        elif self.status is not None:
+            print("🩺 SERVING again")
+        self.status = status
+        for service in SERVICES:
+            self.servicer.set(service, status)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.update()
@@ -0,0 +1,203 @@
+"""
+Time-bounded primary lease with fencing epochs.
+
+The lease is a small JSON file shared by every node on the host
+(LEDGER_LEASE_FILE, default primary.lease at the repo root) holding the
+current holder, its epoch and a wall-clock expiry. The holder renews it
+every RENEW_INTERVAL. Once it lapses, the other candidates take over in
+CANDIDATES order, rank r waiting r * TAKEOVER_GRACE past the expiry, and a
+candidate steps aside while a reachable peer has applied more of the
+ledger, so the most caught-up replica wins. Before taking the lease a node
+runs its prepare hook (catching up from the most advanced peer), and skips
+the takeover for now if that fails. Every takeover bumps the epoch;
+changes are read-modify-write under an flock and replace the file
+atomically.
+
+A node accepts client writes only while it holds the lease (checked
+against its own monotonic clock, SAFETY_MARGIN short of the expiry) and
+only if the write carries no epoch or the current one. Replicas drop
+replicated entries stamped with an epoch older than the lease's unless
+they come from the current holder, so a deposed primary that comes back
+can't push stale writes either.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+import grpc
+import ledger_pb2
+
+LEASE_FILE = os.environ.get(
+    "LEDGER_LEASE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "primary.lease")
+)
+LEASE_TTL = float(os.environ.get("LEDGER_LEASE_TTL", 3))  # seconds a lease stays valid without renewal
+RENEW_INTERVAL = 1        # seconds between renewals by the holder
+POLL_INTERVAL = 0.2       # seconds between lease file checks
+TAKEOVER_GRACE = 1.5      # extra wait past expiry per candidate rank
+SAFETY_MARGIN = 0.5       # the holder stops accepting writes this long before its lease expires
+PEER_TIMEOUT = 0.5        # seconds per GetReplicationStatus call when comparing positions
+
+# Takeover order
+CANDIDATES = ["localhost:50051", "localhost:50052", "localhost:50053"]
+
+Lease = namedtuple("Lease", ["holder", "epoch", "expires"])
+
+
+def read_lease(path=LEASE_FILE):
+    """The current lease, or None if nobody has taken one yet"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return Lease(data["holder"], data["epoch"], data["expires"])
+
+
+def write_lease(path, lease):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(lease._asdict(), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def to_primary_info(lease):
+    return ledger_pb2.PrimaryInfo(holder=lease.holder, epoch=lease.epoch, expires=lease.expires)
+
+
+def peer_heads(pool, node, exclude=None):
+    """Yield (peer, head_seq) for each reachable candidate other than node and exclude"""
+    for peer in CANDIDATES:
+        if peer in (node, exclude):
+            continue
+        try:
+            status = pool.stub(peer).GetReplicationStatus(ledger_pb2.Empty(), timeout=PEER_TIMEOUT)
+        except grpc.RpcError:
+            continue
+        yield peer, status.head_seq
+
+
+def peers_ahead(pool, node, position):
+    """Return ahead(exclude): True if a reachable candidate other than node and
+    exclude reports a higher ledger head than position()"""
+    def ahead(exclude=None):
+        mine = position()
+        return any(head > mine for _, head in peer_heads(pool, node, exclude))
+    return ahead
+
+
+class LeaseManager:
+    """Holds, renews or takes over the primary lease for one node"""
+
+    def __init__(self, node, ahead=lambda exclude=None: False, prepare=lambda: None, path=LEASE_FILE):
+        self.node = node
+        self.rank = CANDIDATES.index(node)
+        self.ahead = ahead
+        self.prepare = prepare          # called before every takeover; raising skips it
+        self.path = path
+        self.lease = read_lease(path)   # latest lease seen
+        self.epoch = 0                  # epoch held by this node, 0 when not primary
+        self._valid_until = 0.0         # monotonic deadline for accepting writes
+        self._renewed = 0.0
+        self._started = time.time()
+        self._changed = threading.Condition()
+        threading.Thread(target=self._run, name="lease", daemon=True).start()
+
+    # ----------- Fencing -----------
+    def is_primary(self):
+        return bool(self.epoch) and time.monotonic() < self._valid_until
+
+    def check(self, epoch=0):
+        """None if a client write carrying epoch may be accepted here, else why not"""
+        if not self.is_primary():
+            lease = self.lease
+            holder = f"{lease.holder} (epoch {lease.epoch})" if lease else "nobody"
+            return f"{self.node} is not the primary; lease held by {holder}"
+        if epoch and epoch != self.epoch:
+            return f"Stale epoch {epoch}; current epoch is {self.epoch}"
+        return None
+
+    def is_fenced(self, epoch, source):
+        """True if an entry source accepted under epoch predates a newer primary"""
+        lease = self.lease
+        return bool(epoch) and lease is not None and epoch < lease.epoch and lease.holder != source
+
+    # ----------- Holding / takeover -----------
+    def _run(self):
+        while True:
+            try:
+                self._tick()
+            except OSError as e:
+                print(f"⚠️ Lease update failed: {e}")
+            time.sleep(POLL_INTERVAL)
+
+    def _tick(self):
+        lease = read_lease(self.path)
+        holding = bool(self.epoch) and lease is not None and (lease.holder, lease.epoch) == (self.node, self.epoch)
+        if holding:
+            if time.monotonic() - self._renewed >= RENEW_INTERVAL:
+                lease = self._update(renew=True)
+        elif self._may_take_over(lease):
+            lease = self._update(renew=False)
+        elif self.epoch:
+            print(f"⚠️ {self.node} lost the primary lease to {lease.holder} (epoch {lease.epoch})")
+            self.epoch = 0
+        self._observe(lease)
+
+    def _may_take_over(self, lease):
+        if lease is None or lease.holder != self.node:  # else ours, from before a restart
+            expired_at = lease.expires if lease else self._started
+            if time.time() < expired_at + self.rank * TAKEOVER_GRACE:
+                return False
+            if self.ahead(exclude=lease.holder if lease else None):
+                return False
+        try:
+            self.prepare()
+        except Exception as e:
+            print(f"⚠️ {self.node} not taking the lease yet: {e}")
+            return False
+        return True
+
+    def _update(self, renew):
+        """Renew or take the lease under the file lock; returns the lease now in effect"""
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            current = read_lease(self.path)
+            ours = current is not None and (current.holder, current.epoch) == (self.node, self.epoch)
+            if renew and not ours:
+                return current  # someone took it between our read and the lock
+            if not renew and current is not None and current.holder != self.node and time.time() < current.expires:
+                return current  # renewed or taken by someone else meanwhile
+            epoch = self.epoch if renew else (current.epoch if current else 0) + 1
+            mono = time.monotonic()
+            lease = Lease(self.node, epoch, time.time() + LEASE_TTL)
+            write_lease(self.path, lease)
+        if not renew:
+            print(f"👑 {self.node} holds the primary lease (epoch {epoch})")
+        self.epoch = epoch
+        self._renewed = mono
+        self._valid_until = mono + LEASE_TTL - SAFETY_MARGIN
+        return lease
+
+    # ----------- Watching -----------
+    def _observe(self, lease):
+        with self._changed:
+            if lease != self.lease:
+                self.lease = lease
+                self._changed.notify_all()
+
+    def watch(self, active):
+        """Yield the lease now and again whenever its holder or epoch changes, while active()"""
+        last = None
+        while active():
+            with self._changed:
+                lease = self.lease
+                if lease is None or (lease.holder, lease.epoch) == last:
+                    self._changed.wait(timeout=1)
+                    continue
+            last = (lease.holder, lease.epoch)
+            yield lease
@@ -24,24 +24,53 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cledger.proto\"X\n\x12TransactionRequest\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\t\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x10\n\x08receiver\x18\x03 \x01(\t\x12\x0e\n\x06status\x18\x04 \x01(\t\"&\n\x13TransactionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"Q\n\x0bLedgerEntry\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\t\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x10\n\x08receiver\x18\x03 \x01(\t\x12\x0e\n\x06status\x18\x04 \x01(\t\"+\n\nLedgerData\x12\x1d\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x0c.LedgerEntry\"\x07\n\x05\x45mpty2q\n\rLedgerService\x12>\n\x11RecordTransaction\x12\x13.TransactionRequest\x1a\x14.TransactionResponse\x12 \n\tGetLedger\x12\x06.Empty\x1a\x0b.LedgerDatab\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cledger.proto\"\x95\x01\n\x12TransactionRequest\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\t\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x10\n\x08receiver\x18\x03 \x01(\t\x12\x0e\n\x06status\x18\x04 \x01(\t\x12\x0b\n\x03seq\x18\x05 \x01(\x04\x12\r\n\x05tx_id\x18\x06 \x01(\t\x12\x10\n\x08trace_id\x18\x07 \x01(\t\x12\r\n\x05\x65poch\x18\x08 \x01(\x04\"U\n\x13TransactionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\r\n\x05tx_id\x18\x02 \x01(\t\x12\x11\n\tduplicate\x18\x03 \x01(\x08\x12\x0b\n\x03seq\x18\x04 \x01(\x04\"P\n\x11TransactionResult\x12\r\n\x05index\x18\x01 \x01(\r\x12\n\n\x02ok\x18\x02 \x01(\x08\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x11\n\tduplicate\x18\x04 \x01(\x08\"q\n\x17\x42ulkTransactionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x02 \x01(\r\x12\x0e\n\x06\x66\x61iled\x18\x03 \x01(\r\x12#\n\x07results\x18\x04 \x03(\x0b\x32\x12.TransactionResult\"\x7f\n\x0bLedgerEntry\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\t\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x10\n\x08receiver\x18\x03 \x01(\t\x12\x0e\n\x06status\x18\x04 \x01(\t\x12\x10\n\x08\x65ntry_id\x18\x05 \x01(\t\x12\x0b\n\x03seq\x18\x06 \x01(\x04\x12\r\n\x05tx_id\x18\x07 \x01(\t\"B\n\x0bLedgerQuery\x12\x11\n\tpage_size\x18\x01 \x01(\r\x12\x10\n\x08\x61\x66ter_id\x18\x02 \x01(\t\x12\x0e\n\x06\x66ields\x18\x03 \x03(\t\"f\n\x10ReplicationBatch\x12\x0f\n\x07session\x18\x01 \x01(\t\x12\x0b\n\x03seq\x18\x02 \x01(\x04\x12$\n\x07\x65ntries\x18\x03 \x03(\x0b\x32\x13.TransactionRequest\x12\x0e\n\x06source\x18\x04 \x01(\t\"=\n\x0eReplicationAck\x12\x0f\n\x07session\x18\x01 \x01(\t\x12\x0b\n\x03seq\x18\x02 \x01(\x04\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"B\n\x0cSinceRequest\x12\x0b\n\x03seq\x18\x01 \x01(\x04\x12\x12\n\nbatch_size\x18\x02 \x01(\r\x12\x11\n\tuntil_seq\x18\x03 \x01(\x04\"-\n\x0bMerkleQuery\x12\r\n\x05level\x18\x01 \x01(\r\x12\x0f\n\x07indices\x18\x02 \x03(\x04\":\n\x0bMerkleNodes\x12\r\n\x05\x64\x65pth\x18\x01 \x01(\r\x12\x0c\n\x04span\x18\x02 \x01(\r\x12\x0e\n\x06hashes\x18\x03 \x03(\x0c\"\x1e\n\nBatchQuery\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\t\"m\n\x0b\x42\x61tchStatus\x12\x10\n\x08\x62\x61tch_id\x18\x01 \x01(\t\x12\r\n\x05\x66ound\x18\x02 \x01(\x08\x12\x0e\n\x06sender\x18\x03 \x01(\t\x12\x10\n\x08receiver\x18\x04 \x01(\t\x12\x0e\n\x06status\x18\x05 \x01(\t\x12\x0b\n\x03seq\x18\x06 \x01(\x04\"%\n\x10\x42\x61tchStatusQuery\x12\x11\n\tbatch_ids\x18\x01 \x03(\t\"/\n\rBatchStatuses\x12\x1e\n\x08statuses\x18\x01 \x03(\x0b\x32\x0c.BatchStatus\"l\n\nReplicaLag\x12\x0e\n\x06target\x18\x01 \x01(\t\x12\x11\n\tacked_seq\x18\x02 \x01(\x04\x12\x13\n\x0blag_entries\x18\x03 \x01(\x04\x12\x13\n\x0blag_seconds\x18\x04 \x01(\x01\x12\x11\n\treachable\x18\x05 \x01(\x08\"D\n\x11ReplicationStatus\x12\x10\n\x08head_seq\x18\x01 \x01(\x04\x12\x1d\n\x08replicas\x18\x02 \x03(\x0b\x32\x0b.ReplicaLag\"=\n\x0bPrimaryInfo\x12\x0e\n\x06holder\x18\x01 \x01(\t\x12\r\n\x05\x65poch\x18\x02 \x01(\x04\x12\x0f\n\x07\x65xpires\x18\x03 \x01(\x01\"+\n\nLedgerData\x12\x1d\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x0c.LedgerEntry\"\x07\n\x05\x45mpty2\xe3\x04\n\rLedgerService\x12>\n\x11RecordTransaction\x12\x13.TransactionRequest\x1a\x14.TransactionResponse\x12 \n\tGetLedger\x12\x06.Empty\x1a\x0b.LedgerData\x12\x45\n\x12RecordTransactions\x12\x13.TransactionRequest\x1a\x18.BulkTransactionResponse(\x01\x12,\n\x0cStreamLedger\x12\x0c.LedgerQuery\x1a\x0c.LedgerEntry0\x01\x12\x33\n\tReplicate\x12\x11.ReplicationBatch\x1a\x0f.ReplicationAck(\x01\x30\x01\x12+\n\x0bStreamSince\x12\r.SinceRequest\x1a\x0b.LedgerData0\x01\x12,\n\x0eGetMerkleNodes\x12\x0c.MerkleQuery\x1a\x0c.MerkleNodes\x12+\n\x0fGetBatchHistory\x12\x0b.BatchQuery\x1a\x0b.LedgerData\x12+\n\x0eGetBatchStatus\x12\x0b.BatchQuery\x1a\x0c.BatchStatus\x12\x35\n\x10GetBatchStatuses\x12\x11.BatchStatusQuery\x1a\x0e.BatchStatuses\x12\x32\n\x14GetReplicationStatus\x12\x06.Empty\x1a\x12.ReplicationStatus\x12&\n\x0cWatchPrimary\x12\x06.Empty\x1a\x0c.PrimaryInfo0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'ledger_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_TRANSACTIONREQUEST']._serialized_start=16
-  _globals['_TRANSACTIONREQUEST']._serialized_end=104
-  _globals['_TRANSACTIONRESPONSE']._serialized_start=106
-  _globals['_TRANSACTIONRESPONSE']._serialized_end=144
-  _globals['_LEDGERENTRY']._serialized_start=146
-  _globals['_LEDGERENTRY']._serialized_end=227
-  _globals['_LEDGERDATA']._serialized_start=229
-  _globals['_LEDGERDATA']._serialized_end=272
-  _globals['_EMPTY']._serialized_start=274
-  _globals['_EMPTY']._serialized_end=281
-  _globals['_LEDGERSERVICE']._serialized_start=283
-  _globals['_LEDGERSERVICE']._serialized_end=396
+  _globals['_TRANSACTIONREQUEST']._serialized_start=17
+  _globals['_TRANSACTIONREQUEST']._serialized_end=166
+  _globals['_TRANSACTIONRESPONSE']._serialized_start=168
+  _globals['_TRANSACTIONRESPONSE']._serialized_end=253
+  _globals['_TRANSACTIONRESULT']._serialized_start=255
+  _globals['_TRANSACTIONRESULT']._serialized_end=335
+  _globals['_BULKTRANSACTIONRESPONSE']._serialized_start=337
+  _globals['_BULKTRANSACTIONRESPONSE']._serialized_end=450
+  _globals['_LEDGERENTRY']._serialized_start=452
+  _globals['_LEDGERENTRY']._serialized_end=579
+  _globals['_LEDGERQUERY']._serialized_start=581
+  _globals['_LEDGERQUERY']._serialized_end=647
+  _globals['_REPLICATIONBATCH']._serialized_start=649
+  _globals['_REPLICATIONBATCH']._serialized_end=751
+  _globals['_REPLICATIONACK']._serialized_start=753
+  _globals['_REPLICATIONACK']._serialized_end=814
+  _globals['_SINCEREQUEST']._serialized_start=816
+  _globals['_SINCEREQUEST']._serialized_end=882
+  _globals['_MERKLEQUERY']._serialized_start=884
+  _globals['_MERKLEQUERY']._serialized_end=929
+  _globals['_MERKLENODES']._serialized_start=931
+  _globals['_MERKLENODES']._serialized_end=989
+  _globals['_BATCHQUERY']._serialized_start=991
+  _globals['_BATCHQUERY']._serialized_end=1021
+  _globals['_BATCHSTATUS']._serialized_start=1023
+  _globals['_BATCHSTATUS']._serialized_end=1132
+  _globals['_BATCHSTATUSQUERY']._serialized_start=1134
+  _globals['_BATCHSTATUSQUERY']._serialized_end=1171
+  _globals['_BATCHSTATUSES']._serialized_start=1173
+  _globals['_BATCHSTATUSES']._serialized_end=1220
+  _globals['_REPLICALAG']._serialized_start=1222
+  _globals['_REPLICALAG']._serialized_end=1330
+  _globals['_REPLICATIONSTATUS']._serialized_start=1332
+  _globals['_REPLICATIONSTATUS']._serialized_end=1400
+  _globals['_PRIMARYINFO']._serialized_start=1402
+  _globals['_PRIMARYINFO']._serialized_end=1463
+  _globals['_LEDGERDATA']._serialized_start=1465
+  _globals['_LEDGERDATA']._serialized_end=1508
+  _globals['_EMPTY']._serialized_start=1510
+  _globals['_EMPTY']._serialized_end=1517
+  _globals['_LEDGERSERVICE']._serialized_start=1520
+  _globals['_LEDGERSERVICE']._serialized_end=2131
 # @@protoc_insertion_point(module_scope)
-
@@ -0,0 +1,232 @@
+"""
+Append-only segmented log engine for LedgerStore.
+
+Entries are appended to numbered segment files (00000001.log, ...) in one
+directory; a segment is sealed once it reaches LOG_SEGMENT_BYTES and a new
+one started. Each record is
+
+    length (4 bytes) | crc32 (4 bytes) | kind (1 byte) | JSON payload
+
+where kind is an entry or a tombstone naming the _id of a deleted entry
+(anti-entropy repair), so nothing is ever rewritten in place. An entry's
+_id is its segment number and byte offset packed into one int, which makes
+ids grow in write order and lets a read go straight to the record. Reads
+go through a read-only mmap of the segment, remapped when the active
+segment has grown past the mapped length.
+
+Indexes live in memory (IndexedStore) and are rebuilt by replaying the
+segments on open; a torn record at the tail of the last segment (a crash
+mid-write) is truncated away.
+
+Durability follows LEDGER_DURABILITY. With "journaled" an insert returns
+only once an fsync has covered it; concurrent inserts share one fsync, the
+first waiter syncing for everyone queued behind it. With "w1" inserts
+return after the write() and a background thread fsyncs every
+LOG_FSYNC_INTERVAL_MS.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from storage import IndexedStore, DURABILITY, check_durability
+
+LOG_SEGMENT_BYTES = int(os.environ.get("LEDGER_LOG_SEGMENT_MB", 64)) * 1024 * 1024  # seal a segment past this size
+LOG_FSYNC_INTERVAL_MS = float(os.environ.get("LEDGER_LOG_FSYNC_INTERVAL_MS", 50))  # background fsync period in w1 mode
+SEGMENT_SPAN = 1 << 40     # _id = segment * SEGMENT_SPAN + offset
+HEADER = struct.Struct("<IIB")
+ENTRY, TOMBSTONE = 1, 2
+META_FILE = "meta.json"
+
+
+def encode_record(kind, payload):
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    return HEADER.pack(len(body), zlib.crc32(body), kind) + body
+
+
+def segment_name(number):
+    return f"{number:08d}.log"
+
+
+class LogStore(IndexedStore):
+    """Ledger entries in append-only segment files, indexed in memory"""
+
+    name = "log"
+
+    def __init__(self, path, durability=DURABILITY, segment_bytes=LOG_SEGMENT_BYTES):
+        super().__init__()
+        self.path = path
+        self.journaled = check_durability(durability) == "journaled"
+        self.segment_bytes = segment_bytes
+        self._maps = {}          # segment -> mmap covering at least every record read so far
+        self._sync_cond = threading.Condition()
+        self._syncing = False
+        self._synced = 0         # every record below this _id is on disk
+        self._error = None       # last fsync failure, reported by ping()
+        os.makedirs(path, exist_ok=True)
+        self._load_meta()
+        segments = sorted(int(f[:-4]) for f in os.listdir(path) if f.endswith(".log"))
+        for number in segments:
+            self._replay(number, last=number == segments[-1])
+        self._segment = segments[-1] if segments else 1
+        self._fd = os.open(self._file(self._segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        self._synced = self._end()
+        print(f"📼 Log store at {path}: {len(self._ids)} entries in {max(len(segments), 1)} segment(s)")
+        if not self.journaled:
+            threading.Thread(target=self._fsync_loop, name="log-fsync", daemon=True).start()
+
+    def _file(self, number):
+        return os.path.join(self.path, segment_name(number))
+
+    def _end(self):
+        return self._segment * SEGMENT_SPAN + self._size
+
+    # ----------- Recovery -----------
+    def _replay(self, number, last):
+        """Index every record of one segment, truncating a torn tail on the last one"""
+        path, offset = self._file(number), 0
+        size = os.path.getsize(path)
+        view = self._view(number, size) if size else b""
+        while offset < size:
+            start = offset + HEADER.size
+            if start <= size:
+                length, crc, kind = HEADER.unpack_from(view, offset)
+                body = view[start:start + length]
+                if len(body) == length and zlib.crc32(body) == crc:
+                    self._apply_record(number * SEGMENT_SPAN + offset, kind, json.loads(body))
+                    offset = start + length
+                    continue
+            if not last:
+                raise IOError(f"Corrupt record in sealed segment {path} at offset {offset}")
+            print(f"⚠️ Truncating torn record at the end of {path} (offset {offset})")
+            self._maps.pop(number).close()
+            os.truncate(path, offset)
+            break
+
+    def _apply_record(self, _id, kind, payload):
+        if kind == ENTRY:
+            self._index(_id, payload)
+        elif kind == TOMBSTONE and payload["_id"] in self._keys:
+            self._unindex(payload["_id"])
+
+    def _load_meta(self):
+        try:
+            with open(os.path.join(self.path, META_FILE)) as f:
+                self._meta = json.load(f)
+        except FileNotFoundError:
+            self._meta = {}
+
+    # ----------- Appends -----------
+    def _append(self, records):
+        """Write encoded records to the active segment; returns the _id of each"""
+        blob = b"".join(records)
+        if self._size and self._size + len(blob) > self.segment_bytes:
+            self._roll()
+        ids, offset = [], self._size
+        for record in records:
+            ids.append(self._segment * SEGMENT_SPAN + offset)
+            offset += len(record)
+        os.write(self._fd, blob)
+        self._size = offset
+        return ids
+
+    def _roll(self):
+        """Seal the active segment (fsynced) and start the next one"""
+        with self._sync_cond:
+            while self._syncing:
+                self._sync_cond.wait()
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._segment += 1
+            self._fd = os.open(self._file(self._segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._size = 0
+            self._synced = self._end()
+
+    def _write(self, docs):
+        return self._append([encode_record(ENTRY, {k: v for k, v in d.items() if k != "_id"}) for d in docs])
+
+    def _forget(self, ids):
+        self._append([encode_record(TOMBSTONE, {"_id": _id}) for _id in ids])
+
+    def set_meta(self, key, fields):
+        with self._lock:
+            super().set_meta(key, fields)
+            tmp = os.path.join(self.path, META_FILE + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self._meta, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    # ----------- fsync batching -----------
+    def _sync(self, _id):
+        if self.journaled:
+            self.sync(_id)
+
+    def sync(self, upto=None):
+        """Block until every record up to _id upto (default: all) is on disk"""
+        with self._sync_cond:
+            target = self._end() - 1 if upto is None else upto
+            while self._synced <= target:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                # Become the syncer for everything written so far, not just this record
+                self._syncing = True
+                fd, end = self._fd, self._end()
+                self._sync_cond.release()
+                try:
+                    os.fsync(fd)
+                    self._error = None
+                except OSError as e:
+                    self._error = e
+                    raise
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    if self._error is None:
+                        self._synced = max(self._synced, end)
+                    self._sync_cond.notify_all()
+
+    def _fsync_loop(self):
+        while True:
+            time.sleep(LOG_FSYNC_INTERVAL_MS / 1000)
+            if self._synced < self._end():
+                try:
+                    self.sync()
+                except OSError as e:
+                    print(f"⚠️ Log fsync failed: {e}")
+
+    # ----------- Reads -----------
+    def _view(self, segment, need):
+        """An mmap of a segment at least need bytes long"""
+        view = self._maps.get(segment)
+        if view is None or len(view) < need:
+            with open(self._file(segment), "rb") as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = view  # a replaced map is closed once no reader holds it
+        return view
+
+    def _load(self, _id):
+        if _id not in self._keys:
+            return None  # deleted
+        segment, offset = divmod(_id, SEGMENT_SPAN)
+        view = self._view(segment, offset + HEADER.size)
+        length, _, _ = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        view = self._view(segment, start + length)
+        doc = json.loads(view[start:start + length])
+        doc["_id"] = _id
+        return doc
+
+    def ping(self):
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            os.close(self._fd)
@@ -0,0 +1,113 @@
+"""
+Incrementally maintained Merkle tree over a node's ledger, for anti-entropy.
+
+Leaves are buckets of BUCKET_SPAN consecutive sequence numbers. Each node
+hash is the XOR of the digests of every entry below it, so adding or
+removing an entry only touches the TREE_DEPTH + 1 nodes on its path and
+the tree never has to be rebuilt. Two nodes compare trees top-down, one
+level per round trip, descending only into subtrees whose hashes differ;
+the differing nodes give the sequence ranges that need repair.
+"""
+import hashlib
+import threading
+
+TREE_DEPTH = 20      # levels below the root; 2**20 leaves
+BUCKET_SPAN = 256    # sequence numbers per leaf
+HASH_BYTES = 16      # digest bytes kept per entry
+MAX_FRONTIER = 4096  # max nodes compared per round trip
+
+
+def entry_digest(doc):
+    """Stable digest of one ledger entry, as an int"""
+    key = "\x1f".join(
+        str(doc.get(f, "")) for f in ("seq", "batch_id", "sender", "receiver", "status")
+    )
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:HASH_BYTES], "big")
+
+
+class MerkleTree:
+    """Sparse XOR Merkle tree keyed by sequence number"""
+
+    def __init__(self, depth=TREE_DEPTH, span=BUCKET_SPAN):
+        self.depth = depth
+        self.span = span
+        self._levels = [dict() for _ in range(depth + 1)]  # level 0 = root, level depth = leaves
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, store, **kwargs):
+        """Build the tree from every sequenced document in a ledger store"""
+        tree = cls(**kwargs)
+        tree.add_all(store.by_seq())
+        return tree
+
+    def _leaf(self, seq):
+        # Sequences past the last bucket all land in the last leaf
+        return min(seq // self.span, (1 << self.depth) - 1)
+
+    def _toggle(self, doc):
+        leaf, digest = self._leaf(doc["seq"]), entry_digest(doc)
+        for level in range(self.depth, -1, -1):
+            index = leaf >> (self.depth - level)
+            value = self._levels[level].get(index, 0) ^ digest
+            if value:
+                self._levels[level][index] = value
+            else:
+                self._levels[level].pop(index, None)
+
+    def add_all(self, docs):
+        """Account for newly written documents (those without a seq are ignored)"""
+        with self._lock:
+            for doc in docs:
+                if doc.get("seq"):
+                    self._toggle(doc)
+
+    def remove_all(self, docs):
+        """Account for deleted documents; XOR makes this the same as adding"""
+        self.add_all(docs)
+
+    def node(self, level, index):
+        """Hash of one tree node, 0 for an empty subtree"""
+        return self._levels[level].get(index, 0)
+
+    def nodes(self, level, indices):
+        """Hashes of several nodes on one level, encoded for the wire"""
+        with self._lock:
+            return [self.node(level, i).to_bytes(HASH_BYTES, "big") for i in indices]
+
+    def node_range(self, level, index):
+        """Sequence range [lo, hi) covered by a node; hi is None if it reaches the last leaf"""
+        shift = self.depth - level
+        first, end = index << shift, (index + 1) << shift
+        hi = None if end >= (1 << self.depth) else end * self.span
+        return first * self.span, hi
+
+
+def diff_ranges(tree, fetch_remote, max_frontier=MAX_FRONTIER):
+    """Walk two trees top-down and return the sequence ranges that differ.
+
+    fetch_remote(level, indices) returns the remote hashes as bytes, in
+    order. Costs one call per level, each covering only differing subtrees.
+    If too many subtrees differ (e.g. an empty replica) the walk stops early
+    and returns the coarser ranges instead of descending further.
+    """
+    frontier = [0]
+    for level in range(tree.depth + 1):
+        remote = fetch_remote(level, frontier)
+        local = tree.nodes(level, frontier)
+        frontier = [i for i, mine, theirs in zip(frontier, local, remote) if mine != theirs]
+        if not frontier or level == tree.depth or 2 * len(frontier) > max_frontier:
+            return merge_ranges([tree.node_range(level, i) for i in frontier])
+        frontier = [child for i in frontier for child in (2 * i, 2 * i + 1)]
+    return []
+
+
+def merge_ranges(ranges):
+    """Coalesce adjacent [lo, hi) ranges (already sorted by lo)"""
+    merged = []
+    for lo, hi in ranges:
+        if merged and merged[-1][1] == lo:
+            merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
@@ -0,0 +1,36 @@
+"""
+Monotonic sequence numbers for ledger writes.
+
+Every write accepted by a primary is stamped with the next sequence number
+and stored with the document (indexed), so replicas can ask for exactly
+the entries after the last one they have instead of dumping the ledger.
+Sequences are unique but not necessarily dense: a failed insert burns its
+numbers.
+"""
+import threading
+
+
+class SequenceAllocator:
+    """Hands out increasing sequence numbers, resuming from the highest stored one"""
+
+    def __init__(self, store):
+        self._last = store.last_seq()
+        self._lock = threading.Lock()
+
+    @property
+    def last(self):
+        """Highest sequence number allocated or observed so far"""
+        return self._last
+
+    def next(self, n=1):
+        """Reserve n consecutive sequence numbers and return the first one"""
+        with self._lock:
+            first = self._last + 1
+            self._last += n
+        return first
+
+    def observe(self, seq):
+        """Record a sequence number assigned elsewhere (replicated writes)"""
+        with self._lock:
+            if seq > self._last:
+                self._last = seq
@@ -46,70 +46,258 @@ if __name__ == "__main__":
 """
 
 import grpc
-from concurrent import futures
-from pymongo import MongoClient
 import ledger_pb2
 import ledger_pb2_grpc
-from flask import Flask
-import threading
-
-# ---------------------- Health Server ----------------------
-app = Flask(__name__)
-
-@app.route("/health")
-def health():
-    """Health check endpoint for monitor"""
-    return "OK", 200
+from metrics import ServerMetricsInterceptor, metrics_route, serve_http
+from health import NodeHealth
+from tracing import Tracer, trace_id_from
+import os
+import time
+from channel_pool import ChannelPool, StreamSlots, SERVER_OPTIONS, server_executor
+from ledger_docs import (
+    request_to_doc, doc_to_request, find_duplicate, duplicate_response,
+    record_batch, stream_entries, stream_since, batch_history
+)
+from replication import (
+    ReplicationQueue, BACKPRESSURE_TIMEOUT, all_of, consistency_for, confirm, to_replication_status
+)
+from follower import Follower
+from sequence import SequenceAllocator
+from status_view import StatusView, to_status
+from group_commit import GroupCommitter
+from storage import DuplicateEntry, open_store
+from ledger_cache import LedgerCache, add_cached_ledger_handler
+from merkle import MerkleTree
+from lease import LeaseManager, CANDIDATES, peers_ahead, to_primary_info
 
-def start_health_server(port):
-    """Run Flask health server in background"""
-    def run():
-        app.run(port=port)
-    thread = threading.Thread(target=run, daemon=True)
-    thread.start()
+BULK_BATCH_SIZE = 500      # max documents per insert_many during bulk ingest
+MONGO_POOL_SIZE = int(os.environ.get("LEDGER_MONGO_POOL_SIZE", 16))  # unary gRPC workers + group-commit writer + catch-up/anti-entropy
+NODE_TARGET = "localhost:50053"  # this node, as named in the primary lease
+MONGO_URI = "mongodb://localhost:27019/"
+REPLICA_TARGETS = [c for c in CANDIDATES if c != NODE_TARGET]  # replicated to while this node holds the lease
+REPLICA_READY_TIMEOUT = 1        # seconds to wait for a replica channel to connect
+HTTP_PORT = 8003                 # /metrics and /replication
 
 # ---------------------- gRPC Service ----------------------
 class LedgerServiceServicer(ledger_pb2_grpc.LedgerServiceServicer):
     def __init__(self):
-        self.client = MongoClient("mongodb://localhost:27019/")
-        self.db = self.client["pharmacy_ledger"]
-        self.col = self.db["transactions"]
+        self.store = open_store("pharmacy_ledger", MONGO_URI, maxPoolSize=MONGO_POOL_SIZE)
+        self.writer = GroupCommitter(self.store)
+        self.seq = SequenceAllocator(self.store)
+        self.tree = MerkleTree.build(self.store)
+        self.status = StatusView(self.store)
+        self.ledger_cache = LedgerCache(self.store)
+        self.tracer = Tracer("pharmacy")
+        self.pool = ChannelPool()
+        self.streams = StreamSlots()
+        self.replication = ReplicationQueue(
+            REPLICA_TARGETS, self.open_replication_stream,
+            head=self.seq.last, source=NODE_TARGET, probe=self.replica_head
+        )
+        self.follower = Follower(self, NODE_TARGET, "💊 Pharmacy")
+        self.lease = LeaseManager(
+            NODE_TARGET,
+            peers_ahead(self.pool, NODE_TARGET, lambda: self.seq.last),
+            prepare=self.follower.catch_up_to_peers
+        )
+        self.health = NodeHealth(self.store, self.replication)
 
+    def written(self, docs):
+        """Fold newly inserted documents into the Merkle tree, status view and GetLedger cache"""
+        self.tree.add_all(docs)
+        self.status.apply(docs)
+        self.ledger_cache.append(docs)
+
+    def open_replication_stream(self, target, batches):
+        """Open a Replicate stream to one replica and return its ack iterator"""
+        if not self.pool.wait_ready(target, REPLICA_READY_TIMEOUT):
+            raise ConnectionError("replica not reachable")
+        print(f"🔗 Replication stream opened to {target}")
+        return self.pool.stub(target).Replicate(batches)
+
+    def replica_head(self, target):
+        """A replica's ledger head, which seeds its replication lane's position"""
+        return self.pool.stub(target).GetReplicationStatus(ledger_pb2.Empty(), timeout=REPLICA_READY_TIMEOUT).head_seq
+
+    # ----------- Fencing -----------
+    def fence(self, epoch, context):
+        """Abort unless this node holds the primary lease (at epoch, if one is given); returns the epoch"""
+        reason = self.lease.check(epoch)
+        if reason:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, reason)
+        return self.lease.epoch
+
+    # ----------- gRPC Endpoint -----------
     def RecordTransaction(self, request, context):
-        """Handles replicated transactions from Factory"""
-        data = {
-            "batch_id": request.batch_id,
-            "sender": request.sender,
-            "receiver": request.receiver,
-            "status": request.status
-        }
-        self.col.insert_one(data)
-        print(f"💊 Pharmacy replicated: {data}")
-        return ledger_pb2.TransactionResponse(message="Transaction recorded at Pharmacy.")
+        """Handles transaction creation and propagation"""
+        trace = trace_id_from(context)
+        with self.tracer.span(trace, "record"):
+            return self.record(request, context, trace)
 
-    def GetLedger(self, request, context):
-        """Returns all ledger entries stored in the Pharmacy DB"""
-        entries = []
-        for tx in self.col.find():
-            entries.append(ledger_pb2.LedgerEntry(
-                batch_id=tx["batch_id"],
-                sender=tx["sender"],
-                receiver=tx["receiver"],
-                status=tx["status"]
+    def record(self, request, context, trace):
+        epoch = self.fence(request.epoch, context)
+        mode, needed = consistency_for(context, len(self.replication.lanes))
+        with self.tracer.span(trace, "dedup"):
+            original = find_duplicate(self.store, request.tx_id)
+        if original:
+            return duplicate_response(original, "Pharmacy")
+
+        data = request_to_doc(request)
+        with self.tracer.span(trace, "backpressure"):
+            if not self.replication.wait_for_capacity(BACKPRESSURE_TIMEOUT):
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Replication backlog full, retry later")
+        data["seq"] = self.seq.next()
+        try:
+            with self.tracer.span(trace, "store_insert", seq=data["seq"]):
+                self.writer.insert(data)
+        except DuplicateEntry as e:
+            # A concurrent retry with the same tx_id got there first
+            original = find_duplicate(self.store, request.tx_id)
+            if original is None:
+                context.abort(grpc.StatusCode.ABORTED, f"Write conflicts with an existing entry: {e}")
+            return duplicate_response(original, "Pharmacy")
+        self.written([data])
+        print(f"💊 Pharmacy recorded: {data}")
+
+        entry = doc_to_request(data)
+        entry.trace_id = trace or ""
+        entry.epoch = epoch
+        acks = self.replication.enqueue([entry])
+        if trace:
+            self.trace_acks(trace, acks)
+        with self.tracer.span(trace, "replica_wait", mode=mode, needed=needed):
+            message = f"Recorded at Pharmacy {confirm(mode, needed, acks, context, 'Pharmacy')}"
+        return ledger_pb2.TransactionResponse(message=message, tx_id=request.tx_id, seq=data["seq"])
+
+    def trace_acks(self, trace, acks):
+        """Record a span per replica covering enqueue → ack, whenever the ack arrives"""
+        start = time.time()
+        for lane, ack in zip(self.replication.lanes, acks):
+            ack.add_done_callback(lambda f, target=lane.target: self.tracer.record(
+                trace, "replicate", start, time.time(), replica=target, ok=f.exception() is None
             ))
-        return ledger_pb2.LedgerData(entries=entries)
+
+    def RecordTransactions(self, request_iterator, context):
+        """Bulk ingest: batch a client stream into ordered insert_many calls"""
+        self.fence(0, context)
+        mode, needed = consistency_for(context, len(self.replication.lanes))
+        results, batch, acks = [], [], []
+
+        def stamp(docs):
+            first = self.seq.next(len(docs))
+            for i, data in enumerate(docs):
+                data["seq"] = first + i
+
+        def flush():
+            epoch = self.fence(0, context)
+            if not self.replication.wait_for_capacity(BACKPRESSURE_TIMEOUT):
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Replication backlog full, retry later")
+            inserted = record_batch(self.store, batch, len(results), results, stamp)
+            self.written(inserted)
+            if inserted:
+                entries = [doc_to_request(d) for d in inserted]
+                for entry in entries:
+                    entry.epoch = epoch
+                acks.append(self.replication.enqueue(entries))
+
+        for request in request_iterator:
+            self.fence(request.epoch, context)
+            batch.append(request_to_doc(request))
+            if len(batch) >= BULK_BATCH_SIZE:
+                flush()
+                batch = []
+        if batch:
+            flush()
+
+        # A replica counts towards the quorum once it has acked every batch
+        lane_acks = [all_of([a[i] for a in acks]) for i in range(len(self.replication.lanes))]
+
+        results.sort(key=lambda r: r.index)
+        accepted = sum(1 for r in results if r.ok)
+        duplicates = sum(1 for r in results if r.duplicate)
+        print(f"💊 Pharmacy bulk recorded {accepted}/{len(results)} transactions ({duplicates} duplicates)")
+        return ledger_pb2.BulkTransactionResponse(
+            message=f"Recorded {accepted} of {len(results)} at Pharmacy {confirm(mode, needed, lane_acks, context, 'Pharmacy')}",
+            accepted=accepted,
+            failed=len(results) - accepted,
+            results=results
+        )
+
+    def Replicate(self, request_iterator, context):
+        """Apply sequenced batches from the primary and ack the highest one applied"""
+        with self.streams.hold(context, "Replicate"):
+            yield from self.follower.replicate(request_iterator, context)
+
+    def GetLedger(self, request, context):
+        """Returns all ledger entries stored in the Pharmacy DB (served from ledger_cache bytes)"""
+        return ledger_pb2.LedgerData.FromString(self.ledger_cache.encoded())
+
+    def StreamLedger(self, request, context):
+        """Stream ledger entries page by page without buffering the whole ledger"""
+        yield from stream_entries(self.store, request, context)
+
+    def StreamSince(self, request, context):
+        """Stream every entry after a sequence number, for replica catch-up"""
+        yield from stream_since(self.store, request.seq, request.batch_size, request.until_seq)
+
+    def GetBatchHistory(self, request, context):
+        """Return one batch's chain of custody, in write order"""
+        return batch_history(self.store, request.batch_id)
+
+    def GetBatchStatus(self, request, context):
+        """Return a batch's current status from the materialized view"""
+        return to_status(request.batch_id, self.status.get_many([request.batch_id])[request.batch_id])
+
+    def GetBatchStatuses(self, request, context):
+        """Bulk GetBatchStatus, one result per requested batch_id"""
+        rows = self.status.get_many(list(request.batch_ids))
+        return ledger_pb2.BatchStatuses(statuses=[to_status(b, rows[b]) for b in request.batch_ids])
+
+    def WatchPrimary(self, request, context):
+        """Stream the primary lease now and whenever its holder or epoch changes"""
+        with self.streams.hold(context, "WatchPrimary"):
+            for lease in self.lease.watch(context.is_active):
+                yield to_primary_info(lease)
+
+    def GetReplicationStatus(self, request, context):
+        """Ledger head and, on the primary, how far each replica is behind it"""
+        stats = self.replication.stats()
+        if not self.lease.is_primary():
+            stats["replicas"] = []  # idle lanes; lag is only meaningful on the primary
+        return to_replication_status(stats)
+
+    def GetMerkleNodes(self, request, context):
+        """Return hashes of the requested Merkle tree nodes for anti-entropy"""
+        if request.level > self.tree.depth:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Tree has only {self.tree.depth} levels")
+        return ledger_pb2.MerkleNodes(
+            depth=self.tree.depth,
+            span=self.tree.span,
+            hashes=self.tree.nodes(request.level, request.indices)
+        )
 
 # ---------------------- Main Server ----------------------
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    ledger_pb2_grpc.add_LedgerServiceServicer_to_server(LedgerServiceServicer(), server)
+    server = grpc.server(
+        server_executor(),
+        options=SERVER_OPTIONS,
+        interceptors=[ServerMetricsInterceptor()],
+    )
+    servicer = LedgerServiceServicer()
+    ledger_pb2_grpc.add_LedgerServiceServicer_to_server(servicer, server)
+    add_cached_ledger_handler(server, servicer.ledger_cache)
+    servicer.health.add_to_server(server)
     server.add_insecure_port('[::]:50053')
     server.start()
+    servicer.follower.start()
 
-    # Health server (port 8003)
-    start_health_server(8003)
+    # Health is the grpc.health.v1 service above; HTTP only carries metrics
+    serve_http(HTTP_PORT, {
+        "/metrics": metrics_route,
+        "/replication": lambda: (None, servicer.replication.stats()),
+    })
 
-    print("💊 Pharmacy node running on port 50053 with /health on 8003...")
+    print(f"💊 Pharmacy node running on port 50053 (gRPC health, {servicer.store.name} storage) with /metrics on {HTTP_PORT}...")
     server.wait_for_termination()
 
 if __name__ == "__main__":
@@ -0,0 +1,470 @@
+"""
+Pluggable storage for a node's ledger.
+
+The servicers never talk to a database directly; they hold a LedgerStore
+and the helpers in ledger_docs, group_commit, sequence, merkle, status_view
+and ledger_cache go through its methods. A stored entry is a plain dict
+with the fields of request_to_doc/entry_to_doc plus an "_id" the engine
+assigns on insert: ids grow in insertion order and str(_id) is the
+StreamLedger cursor. tx_id and seq are unique when present.
+
+Engines, picked per node with LEDGER_STORAGE:
+
+  mongo   the node's Mongo database, as before (default)
+  memory  lists and dicts in the process; nothing survives a restart
+  log     append-only segment files under LEDGER_DATA_DIR (log_store.py)
+
+The memory and log engines need no database process, so replicas and
+benchmarks can run without Docker.
+"""
+import bisect
+import os
+import threading
+from collections import defaultdict
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, MongoClient, WriteConcern
+from pymongo.errors import BulkWriteError, OperationFailure
+
+STORAGE = os.environ.get("LEDGER_STORAGE", "mongo")             # "mongo", "memory" or "log"
+STORAGE_ENGINES = ("mongo", "memory", "log")
+DATA_DIR = os.environ.get(
+    "LEDGER_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)                                                               # log engine segments, one subdirectory per database
+DURABILITY = os.environ.get("LEDGER_DURABILITY", "w1")          # "w1" or "journaled"
+DURABILITY_MODES = ("w1", "journaled")
+CURSOR_BATCH_SIZE = 1000   # documents per Mongo cursor batch / in-memory scan page
+MONGO_PING_TIMEOUT_MS = 1000
+DUPLICATE_KEY = 11000      # Mongo error code for unique index violations
+
+
+class DuplicateEntry(Exception):
+    """An insert repeated a stored tx_id or seq"""
+
+
+def check_durability(durability):
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"LEDGER_DURABILITY must be one of {DURABILITY_MODES}, got {durability!r}")
+    return durability
+
+
+def write_concern(durability=DURABILITY):
+    """WriteConcern for a durability setting"""
+    return WriteConcern(w=1, j=check_durability(durability) == "journaled")
+
+
+def open_store(database, mongo_uri, kind=STORAGE, data_dir=DATA_DIR, durability=DURABILITY, **mongo_options):
+    """Open the ledger store for one node's database"""
+    if kind == "mongo":
+        return MongoStore(mongo_uri, database, durability, **mongo_options)
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "log":
+        from log_store import LogStore
+        return LogStore(os.path.join(data_dir, database), durability)
+    raise ValueError(f"LEDGER_STORAGE must be one of {STORAGE_ENGINES}, got {kind!r}")
+
+
+# ---------------------- Interface ----------------------
+class LedgerStore:
+    """What a node needs from its ledger storage"""
+
+    name = None
+
+    # ----------- Writes -----------
+    def insert(self, docs, ordered=True):
+        """Insert documents, setting each one's _id.
+
+        Returns {index: exception} for the documents that were not written
+        (DuplicateEntry for a repeated tx_id or seq). An ordered insert stops
+        at the first failure; the documents after it are neither written
+        nor reported. Raises if the write failed as a whole.
+        """
+        raise NotImplementedError
+
+    def insert_one(self, doc):
+        """Insert one document, raising DuplicateEntry if its tx_id or seq is taken"""
+        errors = self.insert([doc])
+        if errors:
+            raise errors[0]
+
+    def delete(self, docs):
+        """Remove stored documents (as returned by the read methods)"""
+        raise NotImplementedError
+
+    # ----------- Reads -----------
+    def find_tx(self, tx_id):
+        """The document for a client tx_id, or None"""
+        raise NotImplementedError
+
+    def existing_tx(self, tx_ids):
+        """The subset of tx_ids already stored"""
+        raise NotImplementedError
+
+    def scan(self, after=None, limit=0, fields=None):
+        """Iterate documents in _id order, starting after the cursor str(_id).
+
+        Raises ValueError straight away for a cursor this engine did not
+        issue. fields is a hint: engines may leave other fields out.
+        """
+        raise NotImplementedError
+
+    def by_seq(self, after=0, until=0):
+        """Iterate sequenced documents with after < seq <= until (0 = no bound), by seq"""
+        raise NotImplementedError
+
+    def count_seq(self, after=0, until=0):
+        """Number of documents by_seq(after, until) would yield"""
+        raise NotImplementedError
+
+    def by_batch(self, batch_id):
+        """Every document of one batch by seq; unsequenced ones first, in write order"""
+        raise NotImplementedError
+
+    def latest(self, batch_id):
+        """The batch's document with the highest seq, or None"""
+        raise NotImplementedError
+
+    def last_seq(self):
+        """Highest stored seq, 0 if none"""
+        raise NotImplementedError
+
+    # ----------- Node state -----------
+    def get_meta(self, key):
+        """Small per-node record (e.g. the catch-up watermark) as a dict, or None"""
+        raise NotImplementedError
+
+    def set_meta(self, key, fields):
+        """Update fields of a per-node record, creating it if needed"""
+        raise NotImplementedError
+
+    def status_table(self):
+        """Collection backing the batch status view, or None to keep it in memory"""
+        return None
+
+    def ping(self):
+        """Raise if the store can't currently serve reads and writes"""
+
+    def close(self):
+        pass
+
+
+# ---------------------- Mongo ----------------------
+class MongoStore(LedgerStore):
+    """The transactions collection of a Mongo database"""
+
+    name = "mongo"
+
+    def __init__(self, uri, database, durability=DURABILITY, **options):
+        self.client = MongoClient(uri, **options)
+        self.db = self.client[database]
+        self.col = self.db["transactions"].with_options(write_concern=write_concern(durability))
+        # Dedicated client with short timeouts, so a health check notices an outage in about a second
+        self._ping_client = MongoClient(
+            uri,
+            serverSelectionTimeoutMS=MONGO_PING_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_PING_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_PING_TIMEOUT_MS,
+        )
+        self.ensure_indexes()
+
+    def ensure_indexes(self):
+        # Client transaction ids and sequences are unique; writes without one are left out
+        self.col.create_index(
+            [("tx_id", ASCENDING)],
+            name="tx_id_unique",
+            unique=True,
+            partialFilterExpression={"tx_id": {"$exists": True}},
+        )
+        self.col.create_index(
+            [("seq", ASCENDING)],
+            name="seq_unique",
+            unique=True,
+            partialFilterExpression={"seq": {"$exists": True}},
+        )
+        # One batch's history is a range scan
+        self.col.create_index([("batch_id", ASCENDING), ("seq", ASCENDING)], name="batch_id_seq")
+
+    def insert(self, docs, ordered=True):
+        if not docs:
+            return {}
+        try:
+            self.col.insert_many(docs, ordered=ordered)
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                raise
+            errors = {}
+            for err in e.details.get("writeErrors", []):
+                if err.get("code") == DUPLICATE_KEY:
+                    errors[err["index"]] = DuplicateEntry(err.get("errmsg", ""))
+                else:
+                    errors[err["index"]] = OperationFailure(err.get("errmsg", ""), err.get("code"))
+            return errors
+        return {}
+
+    def delete(self, docs):
+        self.col.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+
+    def find_tx(self, tx_id):
+        return self.col.find_one({"tx_id": tx_id})
+
+    def existing_tx(self, tx_ids):
+        return {d["tx_id"] for d in self.col.find({"tx_id": {"$in": list(tx_ids)}}, {"tx_id": 1})}
+
+    def scan(self, after=None, limit=0, fields=None):
+        criteria = {}
+        if after:
+            try:
+                criteria["_id"] = {"$gt": ObjectId(after)}
+            except InvalidId as e:
+                raise ValueError(str(e)) from e
+        projection = None
+        if fields:
+            projection = {f: 1 for f in fields}
+            projection["seq"] = 1
+        cursor = self.col.find(criteria, projection).sort("_id", 1).batch_size(CURSOR_BATCH_SIZE)
+        return cursor.limit(limit) if limit else cursor
+
+    def _seq_criteria(self, after, until):
+        bounds = {"$gt": after}
+        if until:
+            bounds["$lte"] = until
+        return {"seq": bounds}
+
+    def by_seq(self, after=0, until=0):
+        return self.col.find(self._seq_criteria(after, until)).sort("seq", 1).batch_size(CURSOR_BATCH_SIZE)
+
+    def count_seq(self, after=0, until=0):
+        return self.col.count_documents(self._seq_criteria(after, until))
+
+    def by_batch(self, batch_id):
+        # _id (an ObjectId) breaks ties between unsequenced documents in insertion order
+        return self.col.find({"batch_id": batch_id}).sort([("seq", 1), ("_id", 1)]).hint("batch_id_seq")
+
+    def latest(self, batch_id):
+        return self.col.find_one({"batch_id": batch_id}, sort=[("seq", -1)])
+
+    def last_seq(self):
+        last = self.col.find_one({"seq": {"$exists": True}}, {"seq": 1}, sort=[("seq", -1)])
+        return last["seq"] if last else 0
+
+    def get_meta(self, key):
+        return self.db["replica_state"].find_one({"_id": key}, {"_id": 0})
+
+    def set_meta(self, key, fields):
+        self.db["replica_state"].update_one({"_id": key}, {"$set": fields}, upsert=True)
+
+    def status_table(self):
+        return self.db["batch_status"]
+
+    def ping(self):
+        self._ping_client.admin.command("ping")
+
+    def close(self):
+        self.client.close()
+        self._ping_client.close()
+
+
+# ---------------------- In-process indexes ----------------------
+class IndexedStore(LedgerStore):
+    """Engine whose indexes live in process memory.
+
+    Subclasses only store and load document bodies by integer _id:
+    _write(docs) persists them and returns their new ids (increasing),
+    _load(_id) returns a body or None, _forget(ids) drops bodies and
+    _sync(_id) makes everything up to _id durable once the lock is released.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._ids = []                     # live _ids, ascending
+        self._keys = {}                    # _id -> (batch_id, seq, tx_id)
+        self._tx = {}                      # tx_id -> _id
+        self._seq = {}                     # seq -> _id
+        self._seqs = []                    # stored seqs, ascending
+        self._batches = defaultdict(list)  # batch_id -> _ids, ascending
+        self._meta = {}
+
+    def _write(self, docs):
+        raise NotImplementedError
+
+    def _load(self, _id):
+        raise NotImplementedError
+
+    def _forget(self, ids):
+        raise NotImplementedError
+
+    def _sync(self, _id):
+        pass
+
+    def _index(self, _id, doc):
+        """Add one document to the indexes; ids arrive in increasing order"""
+        seq, tx_id = doc.get("seq", 0), doc.get("tx_id")
+        self._ids.append(_id)
+        self._keys[_id] = (doc["batch_id"], seq, tx_id)
+        self._batches[doc["batch_id"]].append(_id)
+        if tx_id:
+            self._tx[tx_id] = _id
+        if seq:
+            self._seq[seq] = _id
+            if not self._seqs or seq > self._seqs[-1]:
+                self._seqs.append(seq)
+            else:
+                bisect.insort(self._seqs, seq)  # replicas can apply out of order during repair
+
+    def _unindex(self, _id):
+        batch_id, seq, tx_id = self._keys.pop(_id)
+        del self._ids[bisect.bisect_left(self._ids, _id)]
+        ids = self._batches[batch_id]
+        ids.remove(_id)
+        if not ids:
+            del self._batches[batch_id]
+        if tx_id:
+            del self._tx[tx_id]
+        if seq:
+            del self._seq[seq]
+            del self._seqs[bisect.bisect_left(self._seqs, seq)]
+
+    def _get(self, ids):
+        """Load bodies for ids, skipping any deleted since they were looked up"""
+        for _id in ids:
+            doc = self._load(_id)
+            if doc is not None:
+                yield doc
+
+    # ----------- Writes -----------
+    def insert(self, docs, ordered=True):
+        errors, accepted, tx_ids, seqs = {}, [], set(), set()
+        with self._lock:
+            for i, doc in enumerate(docs):
+                tx_id, seq = doc.get("tx_id"), doc.get("seq")
+                if tx_id and (tx_id in self._tx or tx_id in tx_ids):
+                    errors[i] = DuplicateEntry(f"duplicate tx_id {tx_id}")
+                elif seq and (seq in self._seq or seq in seqs):
+                    errors[i] = DuplicateEntry(f"duplicate seq {seq}")
+                else:
+                    if tx_id:
+                        tx_ids.add(tx_id)
+                    if seq:
+                        seqs.add(seq)
+                    accepted.append(doc)
+                    continue
+                if ordered:
+                    break
+            if not accepted:
+                return errors
+            ids = self._write(accepted)
+            for _id, doc in zip(ids, accepted):
+                doc["_id"] = _id
+                self._index(_id, doc)
+        self._sync(ids[-1])
+        return errors
+
+    def delete(self, docs):
+        with self._lock:
+            ids = [d["_id"] for d in docs if d["_id"] in self._keys]
+            if not ids:
+                return
+            self._forget(ids)
+            for _id in ids:
+                self._unindex(_id)
+
+    # ----------- Reads -----------
+    def find_tx(self, tx_id):
+        with self._lock:
+            _id = self._tx.get(tx_id)
+        return None if _id is None else self._load(_id)
+
+    def existing_tx(self, tx_ids):
+        with self._lock:
+            return {t for t in tx_ids if t in self._tx}
+
+    def scan(self, after=None, limit=0, fields=None):
+        return self._scan(int(after) if after else -1, limit)
+
+    def _scan(self, after, limit):
+        remaining = limit or float("inf")
+        while remaining > 0:
+            with self._lock:
+                start = bisect.bisect_right(self._ids, after)
+                page = self._ids[start:start + int(min(CURSOR_BATCH_SIZE, remaining))]
+            if not page:
+                return
+            for doc in self._get(page):
+                yield doc
+                remaining -= 1
+            after = page[-1]
+
+    def _seq_slice(self, after, until):
+        lo = bisect.bisect_right(self._seqs, after)
+        hi = bisect.bisect_right(self._seqs, until) if until else len(self._seqs)
+        return lo, hi
+
+    def by_seq(self, after=0, until=0):
+        while True:
+            with self._lock:
+                lo, hi = self._seq_slice(after, until)
+                seqs = self._seqs[lo:min(hi, lo + CURSOR_BATCH_SIZE)]
+                ids = [self._seq[s] for s in seqs]
+            if not seqs:
+                return
+            yield from self._get(ids)
+            after = seqs[-1]
+
+    def count_seq(self, after=0, until=0):
+        with self._lock:
+            lo, hi = self._seq_slice(after, until)
+        return max(hi - lo, 0)
+
+    def by_batch(self, batch_id):
+        with self._lock:
+            ids = list(self._batches.get(batch_id, ()))
+        return sorted(self._get(ids), key=lambda d: d.get("seq", 0))
+
+    def latest(self, batch_id):
+        with self._lock:
+            ids = self._batches.get(batch_id)
+            if not ids:
+                return None
+            _id = max(ids, key=lambda i: self._keys[i][1])
+        return self._load(_id)
+
+    def last_seq(self):
+        with self._lock:
+            return self._seqs[-1] if self._seqs else 0
+
+    # ----------- Node state -----------
+    def get_meta(self, key):
+        with self._lock:
+            fields = self._meta.get(key)
+            return dict(fields) if fields is not None else None
+
+    def set_meta(self, key, fields):
+        with self._lock:
+            self._meta.setdefault(key, {}).update(fields)
+
+
+# ---------------------- Memory ----------------------
+class MemoryStore(IndexedStore):
+    """Everything in process memory; for replicas that can re-sync and for benchmarks"""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._docs = {}   # _id -> document
+        self._next_id = 1
+
+    def _write(self, docs):
+        ids = list(range(self._next_id, self._next_id + len(docs)))
+        self._next_id += len(docs)
+        for _id, doc in zip(ids, docs):
+            self._docs[_id] = {**doc, "_id": _id}
+        return ids
+
+    def _load(self, _id):
+        return self._docs.get(_id)
+
+    def _forget(self, ids):
+        for _id in ids:
+            self._docs.pop(_id, None)